@@ -20,9 +20,9 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # 关系
-    books = relationship("Book", back_populates="owner", cascade="all, delete-orphan")
-    reading_progress = relationship("ReadingProgress", back_populates="user", cascade="all, delete-orphan")
+    # 关系（外键均为 ON DELETE CASCADE，删除用户时交给数据库级联，不再逐条加载子记录）
+    books = relationship("Book", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    reading_progress = relationship("ReadingProgress", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class InvitationCode(Base):
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, BackgroundTasks, Request, Body
 from typing import Optional, Dict, Any
-from app.utils.deps import get_current_user
-from app.models.user import User
+from app.utils.deps import AuthUser, get_current_auth_user
 from app.services.activity_logger import ActivityLogger
 from app.database import AsyncSessionLocal
 
@@ -13,7 +12,7 @@ async def log_frontend_activity(
     request: Request,
     action: str = Body(..., embed=True),
     details: Optional[Dict[str, Any]] = Body(None, embed=True),
-    current_user: User = Depends(get_current_user)
+    current_user: AuthUser = Depends(get_current_auth_user)
 ):
     """
     接收前端发送的用户活动日志
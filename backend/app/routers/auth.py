@@ -13,8 +13,7 @@ from app.models.user import User, InvitationCode, EmailVerification
 from app.schemas.auth import Token, EmailCodeRequest, RegisterRequest, ChangePasswordRequest
 from app.schemas.user import UserLogin, UserResponse
 from app.utils.security import verify_password, get_password_hash, create_access_token
-from app.utils.deps import get_current_user
-from app.utils.deps import get_current_user
+from app.utils.deps import AuthUser, get_current_user, get_current_auth_user
 from app.config import settings
 from app.services.activity_logger import ActivityLogger
 from app.database import AsyncSessionLocal
@@ -211,7 +210,7 @@ async def login(
 async def logout(
     background_tasks: BackgroundTasks,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
 ):
     """用户退出登录（记录日志）"""
     background_tasks.add_task(
@@ -234,7 +233,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
 @router.post("/invitation-codes", summary="生成邀请码（仅管理员）")
 async def create_invitation_codes(
     count: int = 1,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """生成邀请码（需要管理员权限）"""
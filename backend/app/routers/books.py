@@ -1,12 +1,12 @@
 import os
 import json
 import uuid
+import asyncio
 import shutil
 import zipfile
 import tempfile
 import re
 from typing import Optional, List
-from mutagen.mp3 import MP3
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, BackgroundTasks
 from fastapi.responses import FileResponse, Response
@@ -17,22 +17,20 @@ from app.database import get_db
 from app.models.user import User
 from app.models.book import Book, BookShare, ReadingProgress
 from app.schemas.book import BookResponse, BookListResponse, BookProgressUpdate, BookProgressResponse
-from app.utils.deps import get_current_user, get_current_user_optional, get_current_user_token_or_query
+from app.utils.deps import AuthUser, get_current_auth_user, get_current_user_optional, get_current_user_token_or_query
 from app.config import settings
 from app.utils import epub_utils  # 方案2: EPUB processing
+from app.utils import tts_utils
 from app.services.activity_logger import ActivityLogger
+from app.services.response_cache import response_cache
 from app.database import AsyncSessionLocal
 
 router = APIRouter()
 
 
 def get_mp3_duration(file_path: str) -> float:
-    """获取 MP3 文件时长（秒）"""
-    try:
-        audio = MP3(file_path)
-        return audio.info.length
-    except Exception:
-        return 0.0
+    """获取 MP3 文件时长（秒），无法读取时返回 0"""
+    return tts_utils.get_mp3_duration(file_path) or 0.0
 
 
 def process_book_zip(zip_path: str, output_dir: str) -> dict:
@@ -81,10 +79,13 @@ def process_book_zip(zip_path: str, output_dir: str) -> dict:
         
         # 分析 EPUB 结构并生成 manifest
         try:
+            # 只解析一次 EPUB 结构，封面提取和 manifest 生成共用
+            structure = epub_utils.analyze_epub_structure(epub_extract_dir, include_opf=True)
+            
             # 尝试提取封面
-            epub_utils.extract_cover_image(epub_extract_dir, output_dir)
+            epub_utils.extract_cover_image_from_opf(structure['opf_root'], structure['opf_dir'], output_dir)
 
-            epub_manifest = epub_utils.create_epub_manifest(epub_extract_dir, align_files)
+            epub_manifest = epub_utils.create_epub_manifest(epub_extract_dir, align_files, structure=structure)
             
             # 保存 EPUB manifest
             epub_manifest_path = os.path.join(output_dir, "epub_manifest.json")
@@ -212,7 +213,7 @@ def process_book_zip(zip_path: str, output_dir: str) -> dict:
 
 @router.get("", response_model=BookListResponse, summary="获取书籍列表")
 async def get_books(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取用户的书籍列表（包括自己的和被分享的）"""
@@ -254,7 +255,7 @@ async def create_book(
     cover_file: Optional[UploadFile] = File(None),
     background_tasks: BackgroundTasks = None,  # Inject
     request: Request = None,  # Inject
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -292,8 +293,8 @@ async def create_book(
             shutil.copyfileobj(book_zip.file, tmp)
             tmp_path = tmp.name
         
-        # 处理 ZIP 文件
-        manifest = process_book_zip(tmp_path, full_path)
+        # 处理 ZIP 文件（解压、EPUB 解析、音频时长读取均为阻塞操作，放到线程池执行）
+        manifest = await asyncio.to_thread(process_book_zip, tmp_path, full_path)
         
         # 清理临时文件
         os.unlink(tmp_path)
@@ -447,9 +448,7 @@ async def create_book(
 
 # ============= TXT 文本转有声书 =============
 
-import asyncio
 import logging
-from app.utils import tts_utils
 
 logger = logging.getLogger(__name__)
 
@@ -526,7 +525,7 @@ async def create_book_from_text(
     txt_file: Optional[UploadFile] = File(None),
     cover_file: Optional[UploadFile] = File(None),  # [NEW] Check for cover
     voice: str = Form("zh-CN-YunyangNeural"),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -677,7 +676,7 @@ async def create_book_from_text(
 @router.get("/{book_id}", response_model=BookResponse, summary="获取书籍详情")
 async def get_book(
     book_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取书籍详情"""
@@ -712,7 +711,7 @@ async def get_manifest(
     book_id: uuid.UUID,
     background_tasks: BackgroundTasks,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取书籍的章节清单 (manifest.json)"""
@@ -791,7 +790,7 @@ async def get_chapter_audio(
     book_id: uuid.UUID,
     chapter_id: str,
     request: Request,  # 添加 Request 参数以访问 headers
-    current_user: User = Depends(get_current_user_token_or_query),
+    current_user: AuthUser = Depends(get_current_user_token_or_query),
     db: AsyncSession = Depends(get_db)
 ):
     """获取指定章节的音频文件"""
@@ -898,7 +897,8 @@ async def get_chapter_audio(
 async def get_chapter_text(
     book_id: uuid.UUID,
     chapter_id: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取指定章节的文本内容"""
@@ -911,6 +911,12 @@ async def get_chapter_text(
             detail="书籍不存在"
         )
     
+    # 书籍查询在缓存之外、每次请求都执行；缓存只保存文件内容，所有用户共享
+    cache_key = response_cache.make_key(request)
+    content = response_cache.get(cache_key)
+    if content is not None:
+        return Response(content=content, media_type="text/plain; charset=utf-8")
+    
     text_path = os.path.join(
         settings.MEDIA_PATH, "books", book.storage_path, f"{chapter_id}_text.txt"
     )
@@ -942,9 +948,10 @@ async def get_chapter_text(
                     detail="章节文本不存在"
                 )
     
-    with open(text_path, "r", encoding="utf-8") as f:
+    with open(text_path, "rb") as f:
         content = f.read()
     
+    response_cache.set(book_id, cache_key, content)
     return Response(content=content, media_type="text/plain; charset=utf-8")
 
 
@@ -954,7 +961,8 @@ async def get_chapter_text(
 async def get_chapter_alignment(
     book_id: uuid.UUID,
     chapter_id: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取指定章节的音频-文本对齐数据"""
@@ -967,6 +975,12 @@ async def get_chapter_alignment(
             detail="书籍不存在"
         )
     
+    # 书籍查询在缓存之外、每次请求都执行；缓存只保存文件内容，所有用户共享
+    cache_key = response_cache.make_key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     base_path = os.path.join(settings.MEDIA_PATH, "books", book.storage_path)
     align_path = os.path.join(base_path, f"{chapter_id}_align.json")
     
@@ -993,14 +1007,19 @@ async def get_chapter_alignment(
                     detail="章节对齐数据不存在"
                 )
     
-    with open(align_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # 文件本身就是 JSON，直接返回原始字节，不再解析后重新序列化
+    with open(align_path, "rb") as f:
+        alignment = f.read()
+    
+    response_cache.set(book_id, cache_key, alignment)
+    return Response(content=alignment, media_type="application/json")
 
 
 @router.get("/{book_id}/epub/manifest", summary="获取 EPUB manifest (方案2)")
 async def get_epub_manifest(
     book_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取 EPUB 书籍的 manifest（方案2专用）"""
@@ -1019,6 +1038,12 @@ async def get_epub_manifest(
             detail="此书籍不是 EPUB 格式"
         )
     
+    # 书籍查询在缓存之外、每次请求都执行；缓存只保存文件内容，所有用户共享
+    cache_key = response_cache.make_key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+    
     epub_manifest_path = os.path.join(
         settings.MEDIA_PATH, "books", book.storage_path, "epub_manifest.json"
     )
@@ -1029,8 +1054,12 @@ async def get_epub_manifest(
             detail="EPUB manifest 不存在"
         )
     
-    with open(epub_manifest_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # 文件本身就是 JSON，直接返回原始字节，不再解析后重新序列化
+    with open(epub_manifest_path, "rb") as f:
+        epub_manifest = f.read()
+    
+    response_cache.set(book_id, cache_key, epub_manifest)
+    return Response(content=epub_manifest, media_type="application/json")
 
 
 from fastapi import Cookie, Query
@@ -1123,7 +1152,8 @@ async def get_epub_content(
 async def get_epub_chapter_html(
     book_id: uuid.UUID,
     chapter_file: str,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1146,6 +1176,12 @@ async def get_epub_chapter_html(
             detail="此书籍不是 EPUB 格式"
         )
     
+    # 书籍查询在缓存之外、每次请求都执行；缓存只保存文件内容，所有用户共享
+    cache_key = response_cache.make_key(request)
+    html_content = response_cache.get(cache_key)
+    if html_content is not None:
+        return Response(content=html_content, media_type="text/html; charset=utf-8")
+    
     # 构建 EPUB 章节文件路径
     # 文件在 {storage_path}/epub/{chapter_file}
     chapter_path = os.path.join(
@@ -1167,9 +1203,10 @@ async def get_epub_chapter_html(
         )
     
     # 读取 HTML 内容
-    with open(chapter_path, "r", encoding="utf-8") as f:
+    with open(chapter_path, "rb") as f:
         html_content = f.read()
     
+    response_cache.set(book_id, cache_key, html_content)
     return Response(
         content=html_content,
         media_type="text/html; charset=utf-8"
@@ -1180,7 +1217,7 @@ async def get_epub_chapter_html(
 @router.get("/{book_id}/progress", response_model=BookProgressResponse, summary="获取阅读进度")
 async def get_progress(
     book_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取用户在某本书的阅读进度"""
@@ -1208,7 +1245,7 @@ async def get_progress(
 async def update_progress(
     book_id: uuid.UUID,
     progress_data: BookProgressUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """保存用户的阅读进度"""
@@ -1244,7 +1281,7 @@ async def delete_book(
     book_id: uuid.UUID,
     background_tasks: BackgroundTasks,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """删除书籍（仅限所有者）"""
@@ -1302,6 +1339,9 @@ async def delete_book(
     await db.delete(book)
     await db.commit()
     
+    # 清除该书籍的响应缓存
+    response_cache.invalidate_book(book_id)
+    
     # 记录删除活动
     background_tasks.add_task(
         ActivityLogger.log_activity_background,
@@ -1322,7 +1362,7 @@ async def share_book(
     background_tasks: BackgroundTasks,
     request: Request,
     shared_to_email: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """分享书籍给指定用户或公开分享"""
@@ -1408,7 +1448,7 @@ async def share_book(
 @router.get("/{book_id}/shares", summary="获取书籍分享状态")
 async def get_book_shares(
     book_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """获取书籍的所有分享信息"""
@@ -1456,7 +1496,7 @@ async def unshare_book(
     book_id: uuid.UUID,
     background_tasks: BackgroundTasks,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_auth_user),
     db: AsyncSession = Depends(get_db)
 ):
     """取消书籍的所有分享（包括公开分享和指定用户分享）"""
@@ -0,0 +1,99 @@
+"""
+进程内响应缓存
+
+用于缓存书籍只读内容接口的响应体（对齐数据、章节文本、EPUB manifest 等），
+命中时跳过文件读取。
+
+- 缓存键: (path, query)，同一本书的内容所有用户共享一份；
+  书籍查询等访问检查在缓存之外、每次请求都执行
+- 缓存值为序列化后的响应字节，不会把可变对象交给多个请求
+- 按书籍 ID 分组存放，书籍被删除时整体失效
+- 条目在 TTL 到期后失效；总条目数或总字节数超过上限时淘汰最早写入的条目
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Request
+
+
+class ResponseCache:
+    """按书籍分组、限制总字节数的 TTL 响应缓存"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300.0,
+        max_entries: int = 2048,
+        max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {key: (book_id, expires_at, body)}，按写入顺序排列
+        self._entries: "OrderedDict[Hashable, Tuple[str, float, bytes]]" = OrderedDict()
+        # {book_id: {key, ...}}
+        self._book_keys: Dict[str, set] = {}
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(request: Request) -> Tuple[str, str]:
+        """生成缓存键 (path, query)；path 中已包含书籍 ID"""
+        return (request.url.path, request.url.query)
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """读取缓存，未命中或已过期返回 None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        book_id, expires_at, body = entry
+        if expires_at < time.monotonic():
+            self._discard(key, book_id)
+            return None
+
+        return body
+
+    def set(self, book_id: UUID, key: Hashable, body: bytes) -> None:
+        """写入缓存；单个响应超过总字节上限的 1/8 时不缓存"""
+        book_key = str(book_id)
+        if key in self._entries:
+            self._discard(key, self._entries[key][0])
+
+        if len(body) > self.max_bytes // 8:
+            return
+
+        self._entries[key] = (book_key, time.monotonic() + self.ttl_seconds, body)
+        self._book_keys.setdefault(book_key, set()).add(key)
+        self._total_bytes += len(body)
+
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            oldest_key, (oldest_book, _, _) = next(iter(self._entries.items()))
+            self._discard(oldest_key, oldest_book)
+
+    def invalidate_book(self, book_id: UUID) -> None:
+        """使某本书的所有缓存失效"""
+        for key in self._book_keys.pop(str(book_id), ()):
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= len(entry[2])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._book_keys.clear()
+        self._total_bytes = 0
+
+    def _discard(self, key: Hashable, book_id: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[2])
+        keys = self._book_keys.get(book_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._book_keys[book_id]
+
+
+# 全局实例（单进程 uvicorn）
+response_cache = ResponseCache()
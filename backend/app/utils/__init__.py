@@ -1,11 +1,13 @@
 from app.utils.security import verify_password, get_password_hash, create_access_token, decode_token
-from app.utils.deps import get_current_user, get_current_user_optional
+from app.utils.deps import AuthUser, get_current_user, get_current_auth_user, get_current_user_optional
 
 __all__ = [
     "verify_password",
     "get_password_hash",
     "create_access_token",
     "decode_token",
+    "AuthUser",
     "get_current_user",
+    "get_current_auth_user",
     "get_current_user_optional",
 ]
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Optional
 from uuid import UUID
 
@@ -13,12 +14,25 @@ from app.utils.security import decode_token
 security = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """获取当前登录用户"""
-    token = credentials.credentials
+@dataclass(frozen=True, slots=True)
+class AuthUser:
+    """认证用户的轻量投影（仅包含鉴权所需字段，不加载完整 ORM 对象）"""
+    id: UUID
+    is_active: bool
+    is_admin: bool
+
+
+async def _load_auth_user(db: AsyncSession, user_uuid: UUID) -> Optional[AuthUser]:
+    """只查询鉴权所需的列，返回 AuthUser"""
+    result = await db.execute(
+        select(User.id, User.is_active, User.is_admin).where(User.id == user_uuid)
+    )
+    row = result.one_or_none()
+    return AuthUser(*row) if row else None
+
+
+def _decode_user_id(token: str) -> UUID:
+    """解析 token 中的用户 ID，失败时抛出 401"""
     user_id = decode_token(token)
     
     if not user_id:
@@ -29,16 +43,16 @@ async def get_current_user(
         )
     
     try:
-        user_uuid = UUID(user_id)
+        return UUID(user_id)
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的用户 ID",
         )
-    
-    result = await db.execute(select(User).where(User.id == user_uuid))
-    user = result.scalar_one_or_none()
-    
+
+
+def _check_user(user: Optional[object]) -> None:
+    """检查用户存在且未被禁用"""
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,6 +64,25 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="用户已被禁用",
         )
+
+
+async def _authenticate(db: AsyncSession, token: str) -> AuthUser:
+    """校验 token 并返回有效的 AuthUser（只查询鉴权所需的列）"""
+    user = await _load_auth_user(db, _decode_user_id(token))
+    _check_user(user)
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """获取当前登录用户"""
+    user_uuid = _decode_user_id(credentials.credentials)
+    
+    result = await db.execute(select(User).where(User.id == user_uuid))
+    user = result.scalar_one_or_none()
+    _check_user(user)
     
     return user
 
@@ -79,11 +112,19 @@ async def get_current_user_optional(
     return user if user and user.is_active else None
 
 
+async def get_current_auth_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> AuthUser:
+    """获取当前登录用户（轻量版，只返回 id / is_active / is_admin）"""
+    return await _authenticate(db, credentials.credentials)
+
+
 async def get_current_user_token_or_query(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     token: Optional[str] = Query(None),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> AuthUser:
     """获取当前用户（支持 Header Bearer 或 Query Param token）"""
     access_token = None
     
@@ -99,36 +140,4 @@ async def get_current_user_token_or_query(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id = decode_token(access_token)
-    
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的认证凭据",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    try:
-        user_uuid = UUID(user_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的用户 ID",
-        )
-    
-    result = await db.execute(select(User).where(User.id == user_uuid))
-    user = result.scalar_one_or_none()
-    
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="用户不存在",
-        )
-    
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="用户已被禁用",
-        )
-    
-    return user
+    return await _authenticate(db, access_token)
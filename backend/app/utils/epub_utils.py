@@ -11,6 +11,7 @@ EPUB 处理工具（方案2专用）
 
 import os
 import json
+import shutil
 import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
@@ -18,6 +19,26 @@ from typing import Dict, List, Optional, Tuple
 import re
 
 
+# XML 命名空间（模块加载时构建一次，供所有解析函数复用）
+NS_CONTAINER = {'container': 'urn:oasis:names:tc:opendocument:xmlns:container'}
+NS_OPF = {
+    'opf': 'http://www.idpf.org/2007/opf',
+    'dc': 'http://purl.org/dc/elements/1.1/'
+}
+NS_NCX = {'ncx': 'http://www.daisy.org/z3986/2005/ncx/'}
+NCX_NAV_POINT_TAG = '{http://www.daisy.org/z3986/2005/ncx/}navPoint'
+
+# 章节类型分类规则（按顺序匹配，预编译）
+CHAPTER_TYPE_PATTERNS = [
+    ('Cover', [re.compile(p) for p in (r'cover', r'_cvi_')]),
+    ('Title', [re.compile(p) for p in (r'title', r'_tp_')]),
+    ('Copyright', [re.compile(p) for p in (r'copyright', r'_cop_')]),
+    ('Contents', [re.compile(p) for p in (r'toc', r'contents?', r'inlinetoc')]),
+    ('Introduction', [re.compile(p) for p in (r'intro', r'_itr_')]),
+    ('Chapter', [re.compile(p) for p in (r'chapter', r'_c\d{3,4}_', r'^c\d{3,4}')]),
+]
+
+
 def extract_epub(epub_path: str, output_dir: str) -> Path:
     """
     解压 EPUB 文件到指定目录
@@ -72,11 +93,8 @@ def parse_container_xml(container_path: Path) -> Optional[Path]:
         tree = ET.parse(container_path)
         root = tree.getroot()
         
-        # EPUB 的 container 命名空间
-        ns = {'container': 'urn:oasis:names:tc:opendocument:xmlns:container'}
-        
         # 查找 rootfile 元素
-        rootfile = root.find('.//container:rootfile', ns)
+        rootfile = root.find('.//container:rootfile', NS_CONTAINER)
         
         if rootfile is not None:
             opf_relative_path = rootfile.get('full-path')
@@ -91,15 +109,21 @@ def parse_container_xml(container_path: Path) -> Optional[Path]:
     return None
 
 
-def parse_opf_file(opf_path: Path) -> Dict:
+def parse_opf_file(opf_path: Path, keep_root: bool = False, epub_dir: Optional[Path] = None) -> Dict:
     """
     解析 OPF 文件，提取书籍结构信息
     
+    Args:
+        opf_path: OPF 文件路径
+        keep_root: 是否在结果中保留解析后的 XML 根节点（'root'），供封面提取等复用
+        epub_dir: EPUB 解压根目录（可选）。提供时 spine 条目会附带 'full_path' 和
+                  相对于该目录的 'file_path'
+    
     Returns:
         {
             'metadata': {'title': ..., 'creator': ...},
             'manifest': {item_id: {'href': ..., 'media_type': ...}},
-            'spine': [{'id': ..., 'href': ..., 'order': ...}],
+            'spine': [{'id': ..., 'href': ..., 'order': ..., 'type': ...}],
             'opf_dir': Path
         }
     """
@@ -107,11 +131,7 @@ def parse_opf_file(opf_path: Path) -> Dict:
         tree = ET.parse(opf_path)
         root = tree.getroot()
         
-        # OPF 命名空间
-        ns = {
-            'opf': 'http://www.idpf.org/2007/opf',
-            'dc': 'http://purl.org/dc/elements/1.1/'
-        }
+        ns = NS_OPF
         
         result = {
             'metadata': {},
@@ -145,31 +165,51 @@ def parse_opf_file(opf_path: Path) -> Dict:
                         'properties': properties
                     }
         
-        # 解析 spine（阅读顺序）
+        # 解析 spine（阅读顺序），同时完成章节分类和路径计算
+        opf_dir = result['opf_dir']
         spine_elem = root.find('.//opf:spine', ns)
         if spine_elem is not None:
             for idx, itemref in enumerate(spine_elem.findall('opf:itemref', ns), 1):
                 idref = itemref.get('idref')
                 if idref and idref in result['manifest']:
                     manifest_item = result['manifest'][idref]
-                    result['spine'].append({
+                    href = manifest_item['href']
+                    spine_item = {
                         'order': idx,
                         'id': idref,
-                        'href': manifest_item['href'],
+                        'href': href,
                         'media_type': manifest_item['media_type'],
-                        'properties': manifest_item.get('properties', '')
-                    })
+                        'properties': manifest_item.get('properties', ''),
+                        'type': classify_chapter_type(href, idref)
+                    }
+                    
+                    if epub_dir is not None:
+                        full_path = opf_dir / href
+                        # 计算相对于解压根目录的路径，异常路径回退为 href
+                        if full_path.is_relative_to(epub_dir):
+                            spine_item['file_path'] = str(full_path.relative_to(epub_dir))
+                        else:
+                            spine_item['file_path'] = href
+                        spine_item['full_path'] = str(full_path)
+                    
+                    result['spine'].append(spine_item)
+        
+        if keep_root:
+            result['root'] = root
         
         return result
         
     except Exception as e:
         print(f"Error parsing OPF file: {e}")
-        return {
+        result = {
             'metadata': {},
             'manifest': {},
             'spine': [],
             'opf_dir': opf_path.parent
         }
+        if keep_root:
+            result['root'] = None
+        return result
 
 
 def parse_ncx_file(opf_dir: Path) -> Dict[str, str]:
@@ -192,31 +232,24 @@ def parse_ncx_file(opf_dir: Path) -> Dict[str, str]:
         tree = ET.parse(ncx_path)
         root = tree.getroot()
         
-        # NCX 命名空间
-        ns = {'ncx': 'http://www.daisy.org/z3986/2005/ncx/'}
-        
-        # 递归提取所有 navPoint
-        def extract_nav_points(element, level=0):
-            for nav_point in element.findall('ncx:navPoint', ns):
-                # 获取标题
-                nav_label = nav_point.find('ncx:navLabel/ncx:text', ns)
-                title = nav_label.text if nav_label is not None and nav_label.text else ""
-                
-                # 获取文件路径
-                content = nav_point.find('ncx:content', ns)
-                if content is not None:
-                    src = content.get('src')
-                    # 去掉锚点
-                    file_path = src.split('#')[0] if src else ""
-                    if file_path and title:
-                        ncx_titles[file_path] = title
-                
-                # 递归处理子章节
-                extract_nav_points(nav_point, level + 1)
+        nav_map = root.find('ncx:navMap', NS_NCX)
+        if nav_map is None:
+            return ncx_titles
         
-        nav_map = root.find('ncx:navMap', ns)
-        if nav_map is not None:
-            extract_nav_points(nav_map)
+        # iter() 按文档顺序遍历所有层级的 navPoint（包括子章节），无需递归
+        for nav_point in nav_map.iter(NCX_NAV_POINT_TAG):
+            # 获取标题
+            nav_label = nav_point.find('ncx:navLabel/ncx:text', NS_NCX)
+            title = nav_label.text if nav_label is not None and nav_label.text else ""
+            
+            # 获取文件路径
+            content = nav_point.find('ncx:content', NS_NCX)
+            if content is not None:
+                src = content.get('src')
+                # 去掉锚点
+                file_path = src.split('#')[0] if src else ""
+                if file_path and title:
+                    ncx_titles[file_path] = title
     
     except Exception as e:
         print(f"Error parsing NCX file: {e}")
@@ -231,28 +264,23 @@ def classify_chapter_type(filename: str, file_id: str) -> str:
     filename_lower = filename.lower()
     file_id_lower = file_id.lower()
     
-    # 简化的分类规则
-    patterns = {
-        'Cover': [r'cover', r'_cvi_'],
-        'Title': [r'title', r'_tp_'],
-        'Copyright': [r'copyright', r'_cop_'],
-        'Contents': [r'toc', r'contents?', r'inlinetoc'],
-        'Introduction': [r'intro', r'_itr_'],
-        'Chapter': [r'chapter', r'_c\d{3,4}_', r'^c\d{3,4}'],
-    }
-    
-    for type_name, pattern_list in patterns.items():
+    for type_name, pattern_list in CHAPTER_TYPE_PATTERNS:
         for pattern in pattern_list:
-            if re.search(pattern, filename_lower) or re.search(pattern, file_id_lower):
+            if pattern.search(filename_lower) or pattern.search(file_id_lower):
                 return type_name
     
     return 'Content'
 
 
-def analyze_epub_structure(epub_dir: Path) -> Dict:
+def analyze_epub_structure(epub_dir: Path, include_opf: bool = False) -> Dict:
     """
     分析 EPUB 结构，生成章节信息
     
+    Args:
+        epub_dir: EPUB 解压目录
+        include_opf: 是否附带已解析的 OPF 根节点（'opf_root'）和 OPF 目录（'opf_dir'），
+                     以便 extract_cover_image_from_opf 复用，避免重复解析 XML
+    
     Returns:
         {
             'chapters': [
@@ -278,61 +306,53 @@ def analyze_epub_structure(epub_dir: Path) -> Dict:
     if not opf_path:
         raise ValueError("Cannot find OPF file")
     
-    # 3. 解析 OPF
-    opf_data = parse_opf_file(opf_path)
+    # 3. 解析 OPF（spine 条目已包含分类和路径信息）
+    opf_data = parse_opf_file(opf_path, keep_root=include_opf, epub_dir=epub_dir)
     
     # 4. 解析 NCX 获取标题
     ncx_titles = parse_ncx_file(opf_data['opf_dir'])
     
     # 5. 生成章节列表
-    chapters = []
-    for spine_item in opf_data['spine']:
-        href = spine_item['href']
-        full_path = opf_data['opf_dir'] / href
-        
-        # 获取标题
-        title = ncx_titles.get(href, '')
-        
-        # 分类
-        chapter_type = classify_chapter_type(href, spine_item['id'])
-        
-        # 计算相对于解压根目录的路径
-        try:
-            file_path = full_path.relative_to(epub_dir)
-            file_path_str = str(file_path)
-        except ValueError:
-            # Fallback if path is weird
-            file_path_str = href
-        
-        chapters.append({
+    chapters = [
+        {
             'id': spine_item['id'],
             'order': spine_item['order'],
-            'title': title,
-            'href': href,
-            'file_path': file_path_str,
-            'full_path': str(full_path),
-            'type': chapter_type
-        })
+            'title': ncx_titles.get(spine_item['href'], ''),
+            'href': spine_item['href'],
+            'file_path': spine_item['file_path'],
+            'full_path': spine_item['full_path'],
+            'type': spine_item['type']
+        }
+        for spine_item in opf_data['spine']
+    ]
     
-    return {
+    structure = {
         'chapters': chapters,
         'metadata': opf_data['metadata']
     }
+    
+    if include_opf:
+        structure['opf_root'] = opf_data['root']
+        structure['opf_dir'] = opf_data['opf_dir']
+    
+    return structure
 
 
-def create_epub_manifest(epub_dir: Path, align_files: List[str]) -> Dict:
+def create_epub_manifest(epub_dir: Path, align_files: List[str], structure: Optional[Dict] = None) -> Dict:
     """
     创建 EPUB manifest，关联章节和音频对齐文件
     
     Args:
         epub_dir: EPUB 解压目录
         align_files: 对齐文件列表 (例如 ['ch001_align.json', 'ch002_align.json'])
+        structure: 已有的 analyze_epub_structure 结果（可选，避免重复分析）
         
     Returns:
         EPUB manifest 数据
     """
     # 分析 EPUB 结构
-    structure = analyze_epub_structure(epub_dir)
+    if structure is None:
+        structure = analyze_epub_structure(epub_dir)
     
     # 提取章节编号从对齐文件
     # 例如: ch001_align.json -> 001
@@ -372,41 +392,28 @@ def create_epub_manifest(epub_dir: Path, align_files: List[str]) -> Dict:
     }
 
 
-def extract_cover_image(epub_dir: Path, output_dir: Path) -> Optional[str]:
+def extract_cover_image_from_opf(opf_root, opf_dir: Path, output_dir: Path) -> Optional[str]:
     """
-    从 EPUB 中提取封面图片并保存到输出目录
+    根据已解析的 OPF 根节点提取封面图片并保存到输出目录
     
     Args:
-        epub_dir: EPUB 解压目录 (包含 META-INF)
+        opf_root: OPF 文件的 XML 根节点 (parse_opf_file(..., keep_root=True) 的 'root')
+        opf_dir: OPF 文件所在目录 (封面 href 相对于该目录)
         output_dir: 目标输出目录 (保存 cover.jpg 的位置)
         
     Returns:
         封面相对路径 (例如 "cover.jpg") 或 None
     """
+    if opf_root is None:
+        return None
+    
     try:
-        # 1. 查找 container.xml
-        container_path = find_container_xml(epub_dir)
-        if not container_path:
-            return None
-        
-        # 2. 获取 OPF 路径
-        opf_path = parse_container_xml(container_path)
-        if not opf_path:
-            return None
-            
-        # 3. 解析 OPF
-        tree = ET.parse(opf_path)
-        root = tree.getroot()
-        ns = {
-            'opf': 'http://www.idpf.org/2007/opf',
-            'dc': 'http://purl.org/dc/elements/1.1/'
-        }
-        
+        ns = NS_OPF
         cover_href = None
         
         # 策略 A: 查找 manifest 中 properties="cover-image" 的 item
         # <item id="cover" href="cover.jpg" media-type="image/jpeg" properties="cover-image" />
-        manifest_elem = root.find('.//opf:manifest', ns)
+        manifest_elem = opf_root.find('.//opf:manifest', ns)
         if manifest_elem is not None:
             for item in manifest_elem.findall('opf:item', ns):
                 props = item.get('properties', '')
@@ -417,7 +424,7 @@ def extract_cover_image(epub_dir: Path, output_dir: Path) -> Optional[str]:
         # 策略 B: 查找 metadata 中的 meta name="cover"
         # <meta name="cover" content="cover-image-item-id" />
         if not cover_href:
-            metadata_elem = root.find('.//opf:metadata', ns)
+            metadata_elem = opf_root.find('.//opf:metadata', ns)
             if metadata_elem is not None:
                 for meta in metadata_elem.findall('opf:meta', ns):
                     if meta.get('name') == 'cover':
@@ -430,10 +437,10 @@ def extract_cover_image(epub_dir: Path, output_dir: Path) -> Optional[str]:
                                     break
                         break
         
-        # 4. 如果找到封面，复制文件
+        # 如果找到封面，复制文件
         if cover_href:
             # cover_href 是相对于 OPF 文件的路径
-            src_path = opf_path.parent / cover_href
+            src_path = Path(opf_dir) / cover_href
             if src_path.exists():
                 # 确定扩展名
                 ext = src_path.suffix.lower()
@@ -442,11 +449,46 @@ def extract_cover_image(epub_dir: Path, output_dir: Path) -> Optional[str]:
                 target_name = f"cover{ext}"
                 target_path = Path(output_dir) / target_name
                 
-                import shutil
-                shutil.copy2(src_path, target_path)
+                # 只复制内容，不保留元数据（生成的 Web 资源无需 mtime/权限）
+                shutil.copyfile(src_path, target_path)
                 return target_name
                 
     except Exception as e:
         print(f"Error extracting cover: {e}")
         
     return None
+
+
+def extract_cover_image(epub_dir: Path, output_dir: Path) -> Optional[str]:
+    """
+    从 EPUB 中提取封面图片并保存到输出目录
+    
+    如果已经调用过 analyze_epub_structure，请改用 extract_cover_image_from_opf
+    复用已解析的 OPF，避免重复解析 container.xml 和 OPF。
+    
+    Args:
+        epub_dir: EPUB 解压目录 (包含 META-INF)
+        output_dir: 目标输出目录 (保存 cover.jpg 的位置)
+        
+    Returns:
+        封面相对路径 (例如 "cover.jpg") 或 None
+    """
+    try:
+        # 1. 查找 container.xml
+        container_path = find_container_xml(epub_dir)
+        if not container_path:
+            return None
+        
+        # 2. 获取 OPF 路径
+        opf_path = parse_container_xml(container_path)
+        if not opf_path:
+            return None
+            
+        # 3. 解析 OPF
+        root = ET.parse(opf_path).getroot()
+        
+    except Exception as e:
+        print(f"Error extracting cover: {e}")
+        return None
+    
+    return extract_cover_image_from_opf(root, opf_path.parent, output_dir)
@@ -1,12 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import jwt, JWTError
+import jwt
 from passlib.context import CryptContext
 
 from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# JWT 参数在模块加载时固定，避免每次请求重复构造
+_SECRET = settings.SECRET_KEY
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [settings.ALGORITHM]
+
+# 合法 token 的长度上限，超出的直接拒绝
+_MAX_TOKEN_LENGTH = 4096
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
@@ -20,20 +28,25 @@ def get_password_hash(password: str) -> str:
 
 def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
     """创建 JWT token"""
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"sub": subject, "exp": expire}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SECRET, algorithm=_ALGORITHM)
     return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[str]:
     """解码 JWT token，返回用户 ID"""
+    # 快速拒绝明显畸形的 token（JWT 必须是 header.payload.signature 三段），避免进入签名校验
+    if len(token) > _MAX_TOKEN_LENGTH or token.count('.') != 2:
+        return None
+    
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(token, _SECRET, algorithms=_ALGORITHMS)
         return payload.get("sub")
-    except JWTError:
+    except jwt.PyJWTError:
         return None
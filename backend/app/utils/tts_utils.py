@@ -9,19 +9,78 @@ TTS 文本转语音工具模块
 参考: 用户提供的 Epub07 脚本
 """
 
+import io
 import os
 import re
 import json
 import shutil
 import asyncio
 import subprocess
+from functools import lru_cache
+from bisect import bisect_right
+from itertools import accumulate, chain
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterator
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+# edge_tts 为可选依赖：模块加载时导入一次，未安装时在调用处报错
+try:
+    import edge_tts
+except ImportError:
+    edge_tts = None
+
+# mutagen 用于读取 MP3 参数/时长，未安装时相关函数返回 None
+try:
+    from mutagen.mp3 import MP3
+except ImportError:
+    MP3 = None
+
+# orjson 不可用时回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _write_json(path: str, data) -> None:
+    """写出 JSON 文件（UTF-8，不转义非 ASCII 字符，2 空格缩进）"""
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+# 文本统计用正则：CJK 统一汉字、独立英文单词
+_RE_CJK_CHAR = re.compile(r'[\u4e00-\u9fff]')
+_RE_ENGLISH_WORD = re.compile(r'\b[a-zA-Z]+\b')
+# 按连续换行拆分段落
+_RE_NEWLINES = re.compile(r'\n+')
+
+# Markdown 清洗用正则（模块加载时预编译）
+# 行内结构（可跨行）合并为一个模式，单次扫描全文：代码块、行内代码、图片、链接、HTML 标签
+_RE_INLINE = re.compile(
+    r'(?P<code_block>```[\s\S]*?```)'
+    r'|(?P<code>`[^`]+`)'
+    r'|(?P<image>!\[[^\]]*\]\([^\)]+\))'
+    r'|\[(?P<link_text>[^\]]+)\]\([^\)]+\)'
+    r'|(?P<html><[^>]+>)'
+)
+# 粗体/斜体 (*** ** * ___ __ _) 合并为一个交替模式，长标记优先；
+# 内容首尾须为非空白字符（与 Markdown 规则一致，避免误删 "2 * 3 * 4" 之类的文本）
+_RE_EMPHASIS = re.compile(r'(\*\*\*|\*\*|\*|___|__|_)(?=\S)([^\n]+?)(?<=\S)\1')
+_RE_TABLE_ROW = re.compile(r'\|[^\n]+\|')
+
+# 水平线字符 (---, ***, ___, ===)
+_HR_CHARS = frozenset('-=_*—')
+# 可能出现在行首标记开头的字符（数字另行判断）
+_BLOCK_MARKER_CHARS = _HR_CHARS | frozenset('#+>')
+# 逐行清洗阶段每次处理的文本块大小（字符数，按行边界切分）
+_MD_BLOCK_SIZE = 64 * 1024
+
 
 class TTSConfig:
     """TTS 配置"""
@@ -38,6 +97,32 @@ class TTSConfig:
     # FFmpeg 配置
     FFMPEG_COMMAND = 'ffmpeg'
     FFMPEG_BITRATE = '128k'
+    
+    # Edge-TTS 并发请求上限，及每个请求完成后占用名额的间隔（秒，用于限速）
+    MAX_CONCURRENT_REQUESTS = 4
+    REQUEST_INTERVAL = 0.5
+    
+    # Edge-TTS 建立连接的超时（秒）
+    CONNECT_TIMEOUT = 30
+
+
+# 全进程共享的 Edge-TTS 请求名额（片段和章节并发时统一受此限制）
+_tts_semaphore = asyncio.Semaphore(TTSConfig.MAX_CONCURRENT_REQUESTS)
+
+
+def _estimate_minutes(chinese_chars: int, english_word_count: int) -> float:
+    """中文：约220字/分钟，英文：约200词/分钟"""
+    return chinese_chars / 220.0 + english_word_count / 200.0
+
+
+@lru_cache(maxsize=4096)
+def _analyze_cached(text: str) -> Tuple[int, int, float]:
+    """统计中文字数、英文词数和预估分钟数（同一文本只扫描一次）"""
+    # 纯 ASCII 文本（英文段落）不可能含汉字，跳过 CJK 扫描
+    chinese_chars = 0 if text.isascii() else len(_RE_CJK_CHAR.findall(text))
+    english_word_count = len(_RE_ENGLISH_WORD.findall(text))
+    
+    return chinese_chars, english_word_count, _estimate_minutes(chinese_chars, english_word_count)
 
 
 class TokenAnalyzer:
@@ -46,20 +131,12 @@ class TokenAnalyzer:
     @staticmethod
     def analyze_text(text: str) -> Dict[str, any]:
         """分析文本，返回统计数据"""
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        english_words = re.findall(r'\b[a-zA-Z]+\b', text)
-        english_word_count = len(english_words)
-        total_words = chinese_chars + english_word_count
-        
-        # 中文：约220字/分钟，英文：约200词/分钟
-        chinese_minutes = chinese_chars / 220.0
-        english_minutes = english_word_count / 200.0
-        estimated_minutes = chinese_minutes + english_minutes
+        chinese_chars, english_word_count, estimated_minutes = _analyze_cached(text)
         
         return {
             'chinese_chars': chinese_chars,
             'english_words': english_word_count,
-            'total_words': total_words,
+            'total_words': chinese_chars + english_word_count,
             'estimated_minutes': estimated_minutes
         }
 
@@ -67,6 +144,70 @@ class TokenAnalyzer:
 class MarkdownCleaner:
     """Markdown 内容清洗器"""
     
+    @staticmethod
+    def _replace_inline(match: re.Match) -> str:
+        """_RE_INLINE 的替换函数：链接保留文本（文本内的行内结构同样清洗），其余移除"""
+        link_text = match.group('link_text')
+        if link_text:
+            return _RE_INLINE.sub(MarkdownCleaner._replace_inline, link_text)
+        return ''
+
+    @staticmethod
+    def _strip_block_markers(line: str) -> str:
+        """移除单行的行首标记：标题#、水平线、列表标记(* - + 1.)、引用>（允许行首空格）"""
+        stripped = line.lstrip()
+        first = stripped[:1]
+        if not first or (first not in _BLOCK_MARKER_CHARS and not first.isdecimal()):
+            return line
+        
+        # 标题 (# ## ###)
+        level = len(stripped) - len(stripped.lstrip('#'))
+        if 1 <= level <= 6 and stripped[level:level + 1].isspace():
+            line = stripped = stripped[level:].lstrip()
+        
+        # 水平线
+        body = stripped.rstrip()
+        if len(body) >= 3 and _HR_CHARS.issuperset(body):
+            return ''
+        
+        # 无序列表
+        if stripped[:1] in ('*', '-', '+') and stripped[1:2].isspace():
+            line = stripped = stripped[1:].lstrip()
+        
+        # 有序列表
+        digits = 0
+        while digits < len(stripped) and stripped[digits].isdecimal():
+            digits += 1
+        if digits and stripped[digits:digits + 1] == '.' and stripped[digits + 1:digits + 2].isspace():
+            line = stripped = stripped[digits + 1:].lstrip()
+        
+        # 引用
+        if stripped[:1] == '>' and stripped[1:2].isspace():
+            line = stripped[1:].lstrip()
+        
+        return line
+
+    @staticmethod
+    def _strip_emphasis(text: str) -> str:
+        """移除粗体和斜体，重复直到不再变化（处理嵌套情况，通常 1-2 轮即收敛）"""
+        while True:
+            new_text = _RE_EMPHASIS.sub(r'\2', text)
+            if new_text == text:
+                return text
+            text = new_text
+
+    @staticmethod
+    def _iter_line_blocks(text: str, block_size: int) -> Iterator[str]:
+        """按行边界把文本切成约 block_size 个字符的块（块内不含首尾换行）"""
+        start = 0
+        while start < len(text):
+            end = text.find('\n', start + block_size)
+            if end == -1:
+                yield text[start:]
+                return
+            yield text[start:end]
+            start = end + 1
+
     @staticmethod
     def md_to_txt(md_content: str) -> str:
         """
@@ -79,54 +220,25 @@ class MarkdownCleaner:
         - 清理多余空行
         - 如果输入已经是纯文本，不会出错
         """
-        text = md_content
-        
-        # 移除代码块
-        text = re.sub(r'```[\s\S]*?```', '', text)
-        text = re.sub(r'`[^`]+`', '', text)
-        
-        # 移除链接但保留文本 [text](url) -> text
-        text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-        
-        # 移除图片 ![alt](url)
-        text = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', '', text)
-        
-        # 移除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # 移除Markdown标题标记 (# ## ###) - 允许行首空格
-        text = re.sub(r'^\s*#{1,6}\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除水平线 (---, ***, ___, ===) - 允许行首/行尾空格
-        text = re.sub(r'^\s*[-=_*—]{3,}\s*$', '', text, flags=re.MULTILINE)
-        
-        # 移除列表标记 (*, -, +, 1.) - 允许行首空格
-        text = re.sub(r'^\s*[\*\-\+]\s+', '', text, flags=re.MULTILINE)
-        text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除引用标记 (>)
-        text = re.sub(r'^\s*>\s+', '', text, flags=re.MULTILINE)
-        
-        # 移除粗体和斜体 (*** ** * ___ __ _) - 使用非贪婪匹配
-        # 这里使用简单循环来确保移除干净（例如嵌套情况）
-        for _ in range(2):
-            text = re.sub(r'\*\*\*([^\n]+?)\*\*\*', r'\1', text)
-            text = re.sub(r'\*\*([^\n]+?)\*\*', r'\1', text)
-            text = re.sub(r'\*([^\n]+?)\*', r'\1', text)
-            text = re.sub(r'___([^\n]+?)___', r'\1', text)
-            text = re.sub(r'__([^\n]+?)__', r'\1', text)
-            text = re.sub(r'_([^\n]+?)_', r'\1', text)
-        
-        # 移除表格 (|xxx|xxx|)
-        text = re.sub(r'\|[^\n]+\|', '', text)
-        
-        # 清理多余空行 (3个或更多连续换行 -> 2个换行)
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # 删除所有完全空白的行
-        text = re.sub(r'^\s*$\n', '', text, flags=re.MULTILINE)
+        # 1. 行内结构：一次扫描移除代码块、行内代码、图片、HTML 标签，链接保留文本
+        text = _RE_INLINE.sub(MarkdownCleaner._replace_inline, md_content)
+        
+        # 之后的步骤都只作用于单行，按块处理，避免对整本书反复生成全文副本
+        cleaned_blocks = []
+        for block in MarkdownCleaner._iter_line_blocks(text, _MD_BLOCK_SIZE):
+            # 2. 行首标记（标题、水平线、列表、引用）：逐行用字符串操作识别，不使用正则
+            block = '\n'.join(map(MarkdownCleaner._strip_block_markers, block.split('\n')))
+            
+            # 3. 粗体/斜体、表格
+            block = MarkdownCleaner._strip_emphasis(block)
+            block = _RE_TABLE_ROW.sub('', block)
+            
+            # 4. 删除所有空白行（同时去掉多余空行）
+            block = '\n'.join(line for line in block.split('\n') if line and not line.isspace())
+            if block:
+                cleaned_blocks.append(block)
         
-        return text.strip()
+        return '\n'.join(cleaned_blocks).strip()
 
     @staticmethod
     def clean_copyright_text(text: str) -> str:
@@ -153,42 +265,28 @@ class MarkdownCleaner:
 
 def split_text_by_minutes(text: str, max_minutes: float = TTSConfig.MAX_MINUTES_PER_SEGMENT) -> List[str]:
     """按预估时长拆分文本"""
-    analysis = TokenAnalyzer.analyze_text(text)
+    paragraphs = [p for p in _RE_NEWLINES.split(text) if p and not p.isspace()]
+    para_counts = [_analyze_cached(p) for p in paragraphs]
     
-    if analysis['estimated_minutes'] <= max_minutes:
+    # 汉字和英文单词都不会跨行，全文计数等于各段计数之和，无需再扫描一遍全文
+    total_minutes = _estimate_minutes(sum(c[0] for c in para_counts), sum(c[1] for c in para_counts))
+    if total_minutes <= max_minutes:
         return [text]
     
-    paragraphs = text.split('\n')
-    paragraphs = [p for p in paragraphs if p.strip()]
-    
+    # 贪心装箱：每个片段从 start 开始尽量容纳后续段落，累计时长不超过上限。
+    # 用前缀和 + 二分查找直接定位片段终点，不再逐段累加判断；
+    # 时长以 1/2200 分钟为整数单位（汉字 10、英文单词 11，与 _estimate_minutes 一致），避免浮点累加误差
+    cumulative = list(accumulate((10 * c[0] + 11 * c[1] for c in para_counts), initial=0))
+    limit = max_minutes * 2200
     segments = []
-    current_segment = []
-    current_minutes = 0.0
+    start = 0
     
-    for para in paragraphs:
-        para_analysis = TokenAnalyzer.analyze_text(para)
-        para_minutes = para_analysis['estimated_minutes']
-        
+    while start < len(paragraphs):
+        end = bisect_right(cumulative, cumulative[start] + limit, lo=start + 1) - 1
         # 单段超长，直接作为独立片段
-        if para_minutes > max_minutes:
-            if current_segment:
-                segments.append('\n\n'.join(current_segment))
-                current_segment = []
-                current_minutes = 0.0
-            segments.append(para)
-            continue
-        
-        if current_minutes + para_minutes <= max_minutes:
-            current_segment.append(para)
-            current_minutes += para_minutes
-        else:
-            if current_segment:
-                segments.append('\n\n'.join(current_segment))
-            current_segment = [para]
-            current_minutes = para_minutes
-    
-    if current_segment:
-        segments.append('\n\n'.join(current_segment))
+        end = max(end, start + 1)
+        segments.append('\n\n'.join(paragraphs[start:end]))
+        start = end
     
     return segments
 
@@ -205,9 +303,7 @@ async def run_edge_tts_with_alignment(
     Returns:
         (success: bool, duration: float, alignment_data: List[Dict])
     """
-    try:
-        import edge_tts
-    except ImportError:
+    if edge_tts is None:
         logger.error("edge_tts not installed. Run: pip install edge-tts")
         return False, 0.0, []
     
@@ -215,27 +311,33 @@ async def run_edge_tts_with_alignment(
     last_end_time = 0.0
     
     try:
-        communicate = edge_tts.Communicate(text, voice, boundary='WordBoundary')
+        communicate = edge_tts.Communicate(
+            text, voice,
+            boundary='WordBoundary',
+            connect_timeout=TTSConfig.CONNECT_TIMEOUT,
+        )
+        
+        # 音频先累积在内存中，流结束后一次性写盘，避免在事件循环里逐块同步写文件
+        audio_buffer = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio_buffer += chunk["data"]
+            elif chunk["type"] == "WordBoundary":
+                start_time = chunk["offset"] / 10000000
+                duration = chunk["duration"] / 10000000
+                end_time = start_time + duration
+                
+                alignment_data.append({
+                    "text": chunk["text"],
+                    "start": round(start_time, 3),
+                    "end": round(end_time, 3)
+                })
+                
+                last_end_time = max(last_end_time, end_time)
         
-        with open(output_file, "wb") as f:
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    f.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    start_time = chunk["offset"] / 10000000
-                    duration = chunk["duration"] / 10000000
-                    end_time = start_time + duration
-                    
-                    alignment_data.append({
-                        "text": chunk["text"],
-                        "start": round(start_time, 3),
-                        "end": round(end_time, 3)
-                    })
-                    
-                    last_end_time = max(last_end_time, end_time)
+        await asyncio.to_thread(Path(output_file).write_bytes, audio_buffer)
         
-        with open(align_file, 'w', encoding='utf-8') as f:
-            json.dump(alignment_data, f, ensure_ascii=False, indent=2)
+        await asyncio.to_thread(_write_json, align_file, alignment_data)
         
         return True, last_end_time, alignment_data
         
@@ -244,34 +346,173 @@ async def run_edge_tts_with_alignment(
         return False, 0.0, []
 
 
+class _TTSFailed(Exception):
+    """片段/章节 TTS 失败，用于在并发任务中取消其余任务"""
+
+
+async def _run_all_or_cancel(coros) -> list:
+    """
+    并发运行一组协程，按原顺序返回结果
+    
+    任一协程抛出异常时取消其余协程，并抛出第一个异常（而不是 ExceptionGroup）
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(coro) for coro in coros]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return [task.result() for task in tasks]
+
+
+async def run_edge_tts_limited(
+    text: str, 
+    voice: str, 
+    output_file: str, 
+    align_file: str
+) -> Tuple[bool, float, List[Dict]]:
+    """在并发名额内调用 run_edge_tts_with_alignment，请求结束后保持名额一段时间以限速"""
+    async with _tts_semaphore:
+        result = await run_edge_tts_with_alignment(text, voice, output_file, align_file)
+        await asyncio.sleep(TTSConfig.REQUEST_INTERVAL)  # Rate limiting
+    return result
+
+
+def _read_mp3_params(file_path: str) -> Optional[Tuple[int, int, int]]:
+    """读取 MP3 的 (采样率, 码率, 声道数)，无法解析时返回 None"""
+    if MP3 is None:
+        return None
+    try:
+        info = MP3(file_path).info
+        return info.sample_rate, info.bitrate, info.channels
+    except Exception:
+        return None
+
+
+# 已生成的静音片段: {(采样率, 码率, 声道数, 时长): (MP3 数据, 实际时长)}，只缓存成功的结果
+_silence_cache: Dict[Tuple[int, int, int, float], Tuple[bytes, float]] = {}
+
+
+def _render_silence_mp3(
+    sample_rate: int, bitrate: int, channels: int, duration: float
+) -> Optional[Tuple[bytes, float]]:
+    """
+    用 FFmpeg 生成指定参数的静音 MP3（裸帧，无 ID3/Xing 头），按参数缓存
+    
+    没有 Xing/LAME 头时播放器无法裁掉编码器延迟和补齐的采样，实际播放时长会比
+    duration 略长（24kHz 下 1 秒约为 1.056 秒），因此同时返回按帧测得的实际时长
+    
+    Returns:
+        (MP3 数据, 实际时长秒数)，失败返回 None
+    """
+    key = (sample_rate, bitrate, channels, duration)
+    cached = _silence_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    cmd = [
+        TTSConfig.FFMPEG_COMMAND,
+        '-f', 'lavfi',
+        '-i', f"anullsrc=r={sample_rate}:cl={'mono' if channels == 1 else 'stereo'}",
+        '-t', str(duration),
+        '-codec:a', 'libmp3lame',
+        '-b:a', f"{bitrate // 1000}k",
+        '-write_xing', '0',
+        '-id3v2_version', '0',
+        '-f', 'mp3',
+        'pipe:1'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=60)
+    except Exception as e:
+        logger.warning(f"生成静音片段失败: {str(e)}")
+        return None
+    if result.returncode != 0 or not result.stdout:
+        return None
+    
+    try:
+        length = MP3(io.BytesIO(result.stdout)).info.length
+    except Exception as e:
+        logger.warning(f"无法解析静音片段时长: {str(e)}")
+        return None
+    
+    _silence_cache[key] = (result.stdout, length)
+    return result.stdout, length
+
+
+def _concat_mp3_files(audio_files: List[str], output_path: str, silence_duration: float) -> Optional[float]:
+    """
+    直接按字节拼接 MP3 帧（片段之间插入同参数的静音帧），不解码也不重新编码
+    
+    仅当所有片段的采样率/码率/声道一致时可用，否则返回 None 由调用方回退到 FFmpeg
+    
+    Returns:
+        片段之间实际插入的静音时长（秒），不可用时返回 None
+    """
+    params = {_read_mp3_params(f) for f in audio_files}
+    if len(params) != 1 or None in params:
+        return None
+    
+    silence = b''
+    silence_length = 0.0
+    if silence_duration > 0:
+        rendered = _render_silence_mp3(*params.pop(), silence_duration)
+        if rendered is None:
+            return None
+        silence, silence_length = rendered
+    
+    with open(output_path, 'wb') as out:
+        for i, f in enumerate(audio_files):
+            if i > 0:
+                out.write(silence)
+            with open(f, 'rb') as src:
+                shutil.copyfileobj(src, out)
+    return silence_length
+
+
 def merge_audio_files_with_silence(
     audio_files: List[str], 
     output_path: str, 
     silence_duration: float = TTSConfig.SEGMENT_SILENCE_DURATION
-) -> bool:
-    """合并多个音频文件，片段之间添加静音间隔"""
+) -> Optional[float]:
+    """
+    合并多个音频文件，片段之间添加静音间隔
+    
+    只有一个文件时直接移动到 output_path（输入文件不再保留），跨文件系统时回退为复制
+    
+    Returns:
+        片段之间实际的静音时长（秒，直接拼接帧时可能略长于 silence_duration），
+        用于计算对齐数据的时间偏移；失败返回 None
+    """
     if len(audio_files) == 1:
-        shutil.copy(audio_files[0], output_path)
-        return True
+        try:
+            os.replace(audio_files[0], output_path)
+        except OSError:
+            shutil.copy(audio_files[0], output_path)
+        return silence_duration
     
+    # Edge-TTS 输出的片段参数相同，优先直接拼接帧；参数不一致时用 FFmpeg 解码重编码
     try:
-        input_args = []
-        for f in audio_files:
-            input_args.extend(['-i', os.path.abspath(f)])
+        gap = _concat_mp3_files(audio_files, output_path, silence_duration)
+        if gap is not None:
+            return gap
+    except Exception as e:
+        logger.warning(f"直接拼接音频失败，改用 FFmpeg: {str(e)}")
+    
+    try:
+        n = len(audio_files)
+        input_args = chain.from_iterable(('-i', os.path.abspath(f)) for f in audio_files)
         
         if silence_duration > 0:
-            filter_parts = []
-            for i in range(len(audio_files)):
-                if i < len(audio_files) - 1:
-                    filter_parts.append(f"[{i}:a]apad=pad_dur={silence_duration}[a{i}]")
-                else:
-                    filter_parts.append(f"[{i}:a]anull[a{i}]")
-            inputs_list = ''.join([f"[a{i}]" for i in range(len(audio_files))])
-            concat_filter = f"{inputs_list}concat=n={len(audio_files)}:v=0:a=1[out]"
-            filter_complex = ';'.join(filter_parts) + ';' + concat_filter
+            # 除最后一段外，每段末尾补静音
+            pads = ';'.join(
+                f"[{i}:a]apad=pad_dur={silence_duration}[a{i}]" if i < n - 1 else f"[{i}:a]anull[a{i}]"
+                for i in range(n)
+            )
+            inputs_list = ''.join(f"[a{i}]" for i in range(n))
+            filter_complex = f"{pads};{inputs_list}concat=n={n}:v=0:a=1[out]"
         else:
-            filter_parts = [f"[{i}:a]" for i in range(len(audio_files))]
-            filter_complex = f"{''.join(filter_parts)}concat=n={len(audio_files)}:v=0:a=1[out]"
+            inputs_list = ''.join(f"[{i}:a]" for i in range(n))
+            filter_complex = f"{inputs_list}concat=n={n}:v=0:a=1[out]"
         
         cmd = [
             TTSConfig.FFMPEG_COMMAND,
@@ -285,10 +526,11 @@ def merge_audio_files_with_silence(
         ]
         
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        return result.returncode == 0
+        # apad 在解码后的采样上补静音，间隔时长是精确的
+        return silence_duration if result.returncode == 0 else None
     except Exception as e:
         logger.error(f"合并音频失败: {str(e)}")
-        return False
+        return None
 
 
 def merge_alignment_data(
@@ -296,17 +538,21 @@ def merge_alignment_data(
     segment_durations: List[float], 
     silence_duration: float = TTSConfig.SEGMENT_SILENCE_DURATION
 ) -> List[Dict]:
-    """合并多个片段的对齐数据，调整时间偏移"""
+    """
+    合并多个片段的对齐数据，调整时间偏移
+    
+    注意：直接修改各片段中的条目（原地加上偏移），不再复制字典
+    """
     merged = []
     time_offset = 0.0
     
     for i, alignment in enumerate(all_alignments):
-        for item in alignment:
-            merged.append({
-                "text": item["text"],
-                "start": round(item["start"] + time_offset, 3),
-                "end": round(item["end"] + time_offset, 3)
-            })
+        # 第一个片段偏移为 0，条目已是 3 位小数，无需处理
+        if time_offset:
+            for item in alignment:
+                item["start"] = round(item["start"] + time_offset, 3)
+                item["end"] = round(item["end"] + time_offset, 3)
+        merged.extend(alignment)
         
         if i < len(segment_durations):
             time_offset += segment_durations[i]
@@ -327,66 +573,81 @@ async def process_chapter_with_segments(
     segments = split_text_by_minutes(chapter_text, TTSConfig.MAX_MINUTES_PER_SEGMENT)
     
     if len(segments) == 1:
-        success, duration, _ = await run_edge_tts_with_alignment(
+        success, duration, _ = await run_edge_tts_limited(
             chapter_text, voice, mp3_path, align_path
         )
         return success, duration
     
     logger.info(f"章节过长，拆分为 {len(segments)} 个片段")
     
-    segment_files = []
-    all_alignments = []
-    segment_durations = []
+    segment_files = [os.path.join(temp_dir, f"seg_{i:03d}.mp3") for i in range(len(segments))]
     
-    for i, segment in enumerate(segments):
-        seg_mp3 = os.path.join(temp_dir, f"seg_{i:03d}.mp3")
-        seg_align = os.path.join(temp_dir, f"seg_{i:03d}.json")
-        
-        success, duration, alignment = await run_edge_tts_with_alignment(
-            segment, voice, seg_mp3, seg_align
+    async def run_segment(i: int, segment: str, seg_mp3: str) -> Tuple[float, List[Dict]]:
+        success, duration, alignment = await run_edge_tts_limited(
+            segment, voice, seg_mp3, os.path.join(temp_dir, f"seg_{i:03d}.json")
         )
-        
-        if success:
-            segment_files.append(seg_mp3)
-            all_alignments.append(alignment)
-            segment_durations.append(duration)
-        else:
-            return False, 0.0
-        
-        await asyncio.sleep(0.5)  # Rate limiting
+        if not success:
+            raise _TTSFailed(f"片段 {i} 生成失败")
+        return duration, alignment
+    
+    # 各片段并发请求（受 _tts_semaphore 限制），结果按片段顺序返回；任一片段失败时取消其余片段
+    try:
+        results = await _run_all_or_cancel(
+            run_segment(i, segment, seg_mp3)
+            for i, (segment, seg_mp3) in enumerate(zip(segments, segment_files))
+        )
+    except _TTSFailed as e:
+        logger.error(str(e))
+        return False, 0.0
     
-    # 合并音频
-    silence_duration = TTSConfig.SEGMENT_SILENCE_DURATION
-    if not merge_audio_files_with_silence(segment_files, mp3_path, silence_duration):
+    segment_durations = [duration for duration, _ in results]
+    all_alignments = [alignment for _, alignment in results]
+    
+    # 合并音频（同步调用 FFmpeg/文件 IO，放到线程中执行，不阻塞其他章节）；
+    # 对齐数据按实际插入的静音时长偏移
+    silence_duration = await asyncio.to_thread(
+        merge_audio_files_with_silence, segment_files, mp3_path, TTSConfig.SEGMENT_SILENCE_DURATION
+    )
+    if silence_duration is None:
         return False, 0.0
     
     # 合并对齐数据
     merged_alignment = merge_alignment_data(all_alignments, segment_durations, silence_duration)
-    with open(align_path, 'w', encoding='utf-8') as f:
-        json.dump(merged_alignment, f, ensure_ascii=False, indent=2)
+    await asyncio.to_thread(_write_json, align_path, merged_alignment)
     
     total_duration = sum(segment_durations) + (len(segment_durations) - 1) * silence_duration
     
-    # 清理临时文件
+    # 清理临时文件（单文件合并时已被移走，跳过不存在的文件）
     for f in segment_files:
         try:
             os.remove(f)
-        except:
+        except OSError:
             pass
     
     return True, total_duration
 
 
-def get_mp3_duration(file_path: str) -> Optional[float]:
-    """获取 MP3 文件时长（秒）"""
+@lru_cache(maxsize=1024)
+def _mp3_duration_cached(file_path: str, mtime_ns: int, size: int) -> Optional[float]:
+    """解析 MP3 时长；mtime/size 仅作为缓存键，文件变化后自动重新解析"""
+    if MP3 is None:
+        return None
     try:
-        from mutagen.mp3 import MP3
         audio = MP3(file_path)
         return audio.info.length
     except Exception:
         return None
 
 
+def get_mp3_duration(file_path: str) -> Optional[float]:
+    """获取 MP3 文件时长（秒），按 (路径, 修改时间, 大小) 缓存解析结果"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return _mp3_duration_cached(file_path, stat.st_mtime_ns, stat.st_size)
+
+
 async def process_text_to_audiobook(
     raw_text: str, 
     output_dir: str,
@@ -408,10 +669,9 @@ async def process_text_to_audiobook(
     # 按时长分割成章节
     chapters = split_text_by_minutes(raw_text, TTSConfig.MAX_MINUTES_PER_SEGMENT)
     
-    chapters_info = []
     # voice 变量已通过参数传入，默认为 TTSConfig.VOICE
     
-    for idx, chapter_text in enumerate(chapters, 1):
+    async def process_chapter(idx: int, chapter_text: str) -> Dict:
         file_prefix = f"ch{idx:03d}"
         txt_path = os.path.join(output_dir, f"{file_prefix}_text.txt")
         mp3_path = os.path.join(output_dir, f"{file_prefix}_audio.mp3")
@@ -432,27 +692,33 @@ async def process_text_to_audiobook(
             success, duration = await process_chapter_with_segments(
                 chapter_text, voice, mp3_path, align_path, temp_dir
             )
-            
-            if success:
-                chapters_info.append({
-                    "id": idx,
-                    "title": f"Chapter {idx}",
-                    "audio_file": f"{file_prefix}_audio.mp3",
-                    "align_file": f"{file_prefix}_align.json",
-                    "text_file": f"{file_prefix}_text.txt",
-                    "duration": round(duration, 2),
-                    "words": analysis['total_words']
-                })
-            else:
-                logger.error(f"章节 {idx} 处理失败")
-                return None
         finally:
             # 清理临时目录
             shutil.rmtree(temp_dir, ignore_errors=True)
         
-        # 章节间休息
-        if idx < len(chapters):
-            await asyncio.sleep(1.0)
+        if not success:
+            raise _TTSFailed(f"章节 {idx} 处理失败")
+        
+        return {
+            "id": idx,
+            "title": f"Chapter {idx}",
+            "audio_file": f"{file_prefix}_audio.mp3",
+            "align_file": f"{file_prefix}_align.json",
+            "text_file": f"{file_prefix}_text.txt",
+            "duration": round(duration, 2),
+            "words": analysis['total_words']
+        }
+    
+    # 各章节并发处理，TTS 请求总数由 _tts_semaphore 统一限流；
+    # 任一章节失败时取消其余章节，不再继续请求 TTS、写入 output_dir
+    try:
+        chapters_info = await _run_all_or_cancel(
+            process_chapter(idx, chapter_text)
+            for idx, chapter_text in enumerate(chapters, 1)
+        )
+    except _TTSFailed as e:
+        logger.error(str(e))
+        return None
     
     # 生成 manifest
     manifest = {
@@ -465,8 +731,7 @@ async def process_text_to_audiobook(
     }
     
     manifest_path = os.path.join(output_dir, "manifest.json")
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    _write_json(manifest_path, manifest)
     
     logger.info(f"有声书生成完成: {len(chapters_info)} 章节, 总时长 {manifest['totalDuration']/60:.1f} 分钟")
     
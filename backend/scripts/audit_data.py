@@ -32,11 +32,21 @@ async def audit_data(session: AsyncSession):
     print(f"\n📚 Total Books in Database: {len(db_books)}")
 
     # 2. 获取文件系统中的所有书籍目录
+    # 书籍目录为 books/<user_id>/<book_id>（storage_path 即此相对路径）；
+    # 兼容旧的单层目录：顶层目录名本身就是某本书的 storage_path
     fs_book_dirs = set()
     try:
-        for item in os.listdir(books_dir):
-            if os.path.isdir(os.path.join(books_dir, item)):
-                fs_book_dirs.add(item)
+        with os.scandir(books_dir) as top_entries:
+            for entry in top_entries:
+                if not entry.is_dir():
+                    continue
+                if entry.name in db_book_paths:
+                    fs_book_dirs.add(entry.name)
+                    continue
+                with os.scandir(entry.path) as sub_entries:
+                    children = {f"{entry.name}/{sub.name}" for sub in sub_entries if sub.is_dir()}
+                # 没有子目录的顶层目录按一本书处理
+                fs_book_dirs.update(children or {entry.name})
     except OSError as e:
         print(f"❌ Error accessing media directory: {e}")
         return
@@ -44,25 +54,10 @@ async def audit_data(session: AsyncSession):
     print(f"📁 Total Book Directories in Filesystem: {len(fs_book_dirs)}")
     
     # 3. 查找数据库有但文件系统没有的 (Orphaned DB Records)
-    # storage_path通常就是目录名，但为了稳健，我们假设它可能是路径
-    # 这里我们简化假设 storage_path 就是目录名，或者 storage_path 的第一级目录
-    
-    orphaned_db_records = []
-    for book in db_books:
-        # storage_path exp: "uuid-folder"
-        path = book.storage_path
-        if path not in fs_book_dirs:
-             # 再检查一下是否是完整路径
-             full_path = os.path.join(books_dir, path)
-             if not os.path.exists(full_path):
-                 orphaned_db_records.append(book)
+    orphaned_db_records = [book for book in db_books if book.storage_path not in fs_book_dirs]
 
     # 4. 查找文件系统有但数据库没有的 (Orphaned Files)
-    orphaned_files = []
-    for dir_name in fs_book_dirs:
-        # 假设 storage_path 就是目录名
-        if dir_name not in db_book_paths:
-            orphaned_files.append(dir_name)
+    orphaned_files = sorted(fs_book_dirs - db_book_paths)
 
     # 5. 生成报告
     print("\n" + "="*50)
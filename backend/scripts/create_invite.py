@@ -2,6 +2,7 @@ import asyncio
 import sys
 import os
 from datetime import datetime, timedelta
+from sqlalchemy import insert
 
 # 添加项目根目录到 pythonpath
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,18 +16,20 @@ async def main():
     
     async with AsyncSessionLocal() as session:
         try:
-            codes_generated = []
-            for _ in range(20):
-                code_str = generate_invitation_code()
-                invitation = InvitationCode(
-                    code=code_str,
-                    created_by=None, # System created
-                    expires_at=datetime.utcnow() + timedelta(days=365), # Long expiry
-                    max_uses=10
-                )
-                session.add(invitation)
-                codes_generated.append(code_str)
+            expires_at = datetime.utcnow() + timedelta(days=365) # Long expiry
+            rows = [
+                {
+                    "code": generate_invitation_code(),
+                    "created_by": None, # System created
+                    "expires_at": expires_at,
+                    "max_uses": 10,
+                }
+                for _ in range(20)
+            ]
+            codes_generated = [row["code"] for row in rows]
             
+            # 一条多行 INSERT 写入全部邀请码
+            await session.execute(insert(InvitationCode), rows)
             await session.commit()
             print(f"\n✅ {len(codes_generated)} Invitation Codes Created Successfully:")
             print("-" * 40)
@@ -10,7 +10,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import AsyncSessionLocal, engine
-from app.models.user import User, Book, InvitationCode, EmailVerification
+from app.models.user import User, InvitationCode, EmailVerification
+from app.models.book import Book
 from app.models.activity import UserActivityLog
 from app.config import settings
 
@@ -28,14 +29,13 @@ async def list_users(session: AsyncSession):
 async def delete_user(session: AsyncSession, email: str):
     """删除特定用户及其所有数据"""
     # 查找用户
-    result = await session.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    result = await session.execute(select(User.id).where(User.email == email))
+    user_id = result.scalar_one_or_none()
     
-    if not user:
+    if not user_id:
         print(f"❌ User not found: {email}")
         return
 
-    user_id = user.id
     print(f"⚠️  Deleting user: {email} ({user_id})")
     
     # 1. 删除关联的活动日志
@@ -46,26 +46,24 @@ async def delete_user(session: AsyncSession, email: str):
     except Exception:
          pass # 忽略如果表不存在
 
-    # 2. 删除书籍文件 (物理删除)
-    # 首先查询用户的所有书籍
-    result = await session.execute(select(Book).where(Book.owner_id == user_id))
-    books = result.scalars().all()
+    # 2. 删除书籍记录 (DB)，同时返回被删书籍信息用于处理物理文件
+    result = await session.execute(
+        delete(Book)
+        .where(Book.owner_id == user_id)
+        .returning(Book.id, Book.title, Book.storage_path)
+    )
     
-    deleted_files = 0
-    for book in books:
+    for book_id, title, storage_path in result.all():
         # TODO: 这里只处理了数据库记录，实际上应该删除物理文件
         # 在 Docker 环境中，这可能需要挂载卷的权限
         # 暂时只打印路径
-        print(f"   - Would delete book files for: {book.title} ({book.id})")
-        
-    # 3. 删除书籍记录 (DB)
-    await session.execute(delete(Book).where(Book.owner_id == user_id))
+        print(f"   - Would delete book files for: {title} ({book_id}) -> {storage_path}")
     
-    # 4. 删除邀请码使用记录 (将 used_by 置空 或 删除)
+    # 3. 删除邀请码使用记录 (将 used_by 置空 或 删除)
     # 这里我们选择保留邀请码但清除使用状态? 不, 保持原样, 只是用户被删了
     
-    # 5. 删除用户
-    await session.delete(user)
+    # 4. 删除用户（阅读进度、分享由外键 ON DELETE CASCADE 级联删除，邀请码引用置空）
+    await session.execute(delete(User).where(User.id == user_id))
     await session.commit()
     print(f"✅ User {email} and all associated data deleted.")
 
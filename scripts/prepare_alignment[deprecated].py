@@ -15,17 +15,31 @@ import os
 import sys
 import json
 import argparse
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 
 try:
+    import numpy as np
     import stable_whisper
+    from stable_whisper.audio import load_audio
     from tqdm import tqdm
 except ImportError:
     print("错误: 请先安装依赖")
     print("运行: pip install -r requirements.txt")
     sys.exit(1)
 
+# orjson 不可用时回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ============================================================
 # 用户配置区域 - 在这里设置你的参数
@@ -42,6 +56,16 @@ OUTPUT_MERGED_TXT = "merged_book.txt"  # 合并后的文本文件
 # Whisper 模型大小: "tiny", "base", "small", "medium", "large"
 MODEL_SIZE = "medium"
 
+# 自定义 MLX 模型（本地路径或 HF 仓库名），例如用 mlx-examples 的 convert.py -q 量化后的模型
+# None 表示使用 mlx-community/whisper-{MODEL_SIZE}-mlx（fp16 权重）
+MLX_MODEL = None
+
+# 转录后端: "mlx" (Apple Silicon GPU), "faster" (NVIDIA GPU, faster-whisper/CTranslate2), "stable" (CPU)
+BACKEND = "mlx"
+
+# 时间戳粒度: "word" (词级别), "sentence" (句子级别，跳过词级别对齐计算，转录更快)
+GRANULARITY = "word"
+
 # 语言代码: "zh" (中文), "en" (英文), "ja" (日文) 等
 LANGUAGE = "zh"
 
@@ -54,11 +78,102 @@ GAP_SECONDS = 1.0
 # 是否合并文本文件
 MERGE_TXT = True
 
+# 跳过所有交互确认（等同于对每个提示输入 YES），用于无人值守的批处理
+# 也可以通过环境变量 AUDIOBOOK_ASSUME_YES=1 或命令行 --yes 开启
+ASSUME_YES = False
+
+# GPU 后端不可用时是否允许回退到 CPU 模式（--no-cpu-fallback 关闭）
+CPU_FALLBACK = True
+
+# 转录当前文件时，后台提前解码的音频文件数（解码结果为 16kHz float32，1 小时约 230MB）
+PREFETCH_AUDIO = 2
+
+# 每个音频的对齐结果在转录完成后立即写入同目录的 <编号>.align.json，
+# 中途崩溃后重新运行会直接读取这些文件，跳过已完成的音频
+ALIGN_SIDECAR_SUFFIX = ".align.json"
+
 # ============================================================
 # 以下是脚本代码，无需修改
 # ============================================================
 
 
+# 已加载的模型: {(backend, model_name): model}，每个后端/模型在一次运行中只加载一次
+_MODEL_CACHE: Dict[Tuple[str, str], Any] = {}
+
+
+def get_model(model_name: str, backend: str) -> Any:
+    """
+    获取（必要时加载并缓存）指定后端的 Whisper 模型
+    
+    参数:
+        model_name: Whisper 模型名称
+        backend: "mlx"、"faster" 或 "stable"（mlx 后端的 model_name 也可以是本地路径或 HF 仓库名）
+    
+    返回:
+        mlx: 模型路径/仓库名。mlx_whisper.transcribe 只接受路径/仓库名，
+             这里先通过其 ModelHolder 以 fp16 预加载权重，之后按同一名称调用即复用已加载的模型
+        faster: faster_whisper.WhisperModel 实例（CUDA）
+        stable: stable_whisper 模型实例
+    """
+    key = (backend, model_name)
+    if key in _MODEL_CACHE:
+        return _MODEL_CACHE[key]
+    
+    if backend == "mlx":
+        import mlx.core as mx
+        from mlx_whisper.transcribe import ModelHolder
+        is_size = "/" not in model_name and not Path(model_name).exists()
+        model = f"mlx-community/whisper-{model_name}-mlx" if is_size else model_name
+        # 进程内只加载一次，之后每个文件复用。mlx_whisper 的解码循环已用 mx.async_eval 流水线执行，
+        # 解码器的 KV cache 长度逐 token 变化，再用 mx.compile 包装只会反复重新编译
+        ModelHolder.get_model(model, mx.float16)
+    elif backend == "faster":
+        model = load_faster_whisper_model(model_name)
+    elif backend == "stable":
+        model = stable_whisper.load_model(model_name)
+    else:
+        raise ValueError(f"未知后端: {backend}")
+    
+    _MODEL_CACHE[key] = model
+    return model
+
+
+def load_faster_whisper_model(model_name: str) -> Any:
+    """
+    在 CUDA 上加载 faster-whisper 模型
+    
+    优先使用 float16；显卡不支持时依次回退到 int8_float16、int8
+    """
+    from faster_whisper import WhisperModel
+    
+    last_error = None
+    for compute_type in ("float16", "int8_float16", "int8"):
+        try:
+            model = WhisperModel(model_name, device="cuda", compute_type=compute_type)
+            print(f"  faster-whisper 计算精度: {compute_type}")
+            return model
+        except ValueError as e:
+            # CTranslate2 在设备不支持该计算类型时抛出 ValueError
+            last_error = e
+    raise last_error
+
+
+def read_json(path: Path) -> Any:
+    """读取 JSON 文件"""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path: Path, data: Any, indent: bool = True):
+    """写出 JSON 文件（UTF-8，不转义非 ASCII 字符；indent=True 时 2 空格缩进）"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        Path(path).write_bytes(orjson.dumps(data, option=option))
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2 if indent else None)
 
 
 def load_audio_files(input_dir: Path) -> List[tuple]:
@@ -69,26 +184,240 @@ def load_audio_files(input_dir: Path) -> List[tuple]:
     """
     files = []
     
-    for audio_file in sorted(input_dir.glob("*.mp3")):
+    # 一次目录遍历同时收集 mp3 文件名和 txt 文件编号，不再逐个检查 txt 是否存在
+    mp3_names = []
+    txt_stems = set()
+    with os.scandir(input_dir) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext == ".mp3":
+                mp3_names.append(entry.name)
+            elif ext == ".txt":
+                txt_stems.add(stem)
+    
+    for audio_name in sorted(mp3_names):
         # 获取文件编号 (例如 00001.mp3 -> 00001)
-        stem = audio_file.stem
+        stem = os.path.splitext(audio_name)[0]
         
         # 查找对应的文本文件
-        txt_file = input_dir / f"{stem}.txt"
-        
-        if txt_file.exists():
-            files.append((audio_file, txt_file, stem))
+        if stem in txt_stems:
+            files.append((input_dir / audio_name, input_dir / f"{stem}.txt", stem))
         else:
-            print(f"警告: 找不到 {stem}.txt，跳过 {audio_file.name}")
+            print(f"警告: 找不到 {stem}.txt，跳过 {audio_name}")
     
     return files
 
 
+def to_centiseconds(seconds: float) -> int:
+    """
+    秒 → 整数厘秒（四舍五入）
+    
+    时间戳统一按厘秒取整：单个文件的结果直接存 厘秒/100，
+    合并时的偏移量累加在整数厘秒上进行，避免浮点误差随文件数累积
+    """
+    return int(seconds * 100 + 0.5)
+
+
+def segments_to_alignment(result_segments) -> List[Dict[str, Any]]:
+    """
+    把 stable-ts / faster-whisper 的转录段落转换为对齐数据（优先使用词级别时间戳）
+    
+    两者的段落对象都有 start/end/text/words 属性，词对象有 start/end/word 属性
+    """
+    segments = []
+    segment_id = 0
+    
+    for segment in result_segments:
+        # 检查是否有词级别数据
+        if getattr(segment, 'words', None):
+            for word in segment.words:
+                word_text = word.word.strip() if hasattr(word, 'word') else str(word).strip()
+                if not word_text:
+                    continue
+                seg_data = {
+                    "id": segment_id,
+                    "start": to_centiseconds(word.start) / 100,
+                    "end": to_centiseconds(word.end) / 100,
+                    "text": word_text
+                }
+                segments.append(seg_data)
+                segment_id += 1
+        else:
+            # 回退到句子级别
+            seg_data = {
+                "id": segment_id,
+                "start": to_centiseconds(segment.start) / 100,
+                "end": to_centiseconds(segment.end) / 100,
+                "text": segment.text.strip()
+            }
+            segments.append(seg_data)
+            segment_id += 1
+    
+    return segments
+
+
+def prefetch_audio(audio_paths: List[Path], depth: int = PREFETCH_AUDIO) -> Iterator[Future]:
+    """
+    在后台线程中提前解码音频，按顺序返回解码任务
+    
+    调用方转录当前文件时，后面最多 depth 个文件已在解码，
+    磁盘读取和 ffmpeg 解码与 GPU 计算重叠
+    
+    返回:
+        Future 迭代器，result() 为 16kHz 单声道 float32 波形
+    """
+    if depth < 1:
+        # 不预取：按需在当前线程解码
+        for audio_path in audio_paths:
+            future = Future()
+            try:
+                future.set_result(load_audio(str(audio_path)))
+            except Exception as e:
+                future.set_exception(e)
+            yield future
+        return
+    
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        paths = iter(audio_paths)
+        pending = deque(executor.submit(load_audio, str(p)) for p in islice(paths, depth))
+        while pending:
+            future = pending.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append(executor.submit(load_audio, str(next_path)))
+            yield future
+
+
+def transcribe_with_mlx(
+    audio_path: Path,
+    model_name: str,
+    language: str,
+    mlx_model: Optional[str] = None,
+    audio: Optional[np.ndarray] = None,
+    word_timestamps: bool = True
+) -> Dict[str, Any]:
+    """使用 mlx-whisper（Apple Silicon GPU）转录单个音频文件（audio 为已解码的波形时直接使用）"""
+    import mlx_whisper
+    print(f"  加载模型: {model_name} (MLX GPU 加速)")
+    mlx_repo = get_model(mlx_model or model_name, "mlx")
+    # 使用 mlx-whisper 进行转录（GPU 加速）
+    result_mlx = mlx_whisper.transcribe(
+        audio if audio is not None else str(audio_path),
+        path_or_hf_repo=mlx_repo,
+        verbose=False,
+        language=language,
+        fp16=True,  # 以 fp16 推理（显存带宽减半）
+        word_timestamps=word_timestamps  # 是否计算词级别时间戳
+    )
+    print("  ✓ MLX GPU 加速已启用")
+    
+    # 提取词级别对齐数据
+    segments = []
+    segment_id = 0
+    
+    for segment in result_mlx["segments"]:
+        # 检查是否有词级别数据
+        if "words" in segment and segment["words"]:
+            # 使用词级别时间戳
+            for word_data in segment["words"]:
+                word_text = word_data.get("word", "").strip()
+                if not word_text:
+                    continue
+                seg_data = {
+                    "id": segment_id,
+                    "start": to_centiseconds(word_data["start"]) / 100,
+                    "end": to_centiseconds(word_data["end"]) / 100,
+                    "text": word_text
+                }
+                segments.append(seg_data)
+                segment_id += 1
+        else:
+            # 回退到句子级别
+            seg_data = {
+                "id": segment_id,
+                "start": to_centiseconds(segment["start"]) / 100,
+                "end": to_centiseconds(segment["end"]) / 100,
+                "text": segment["text"].strip()
+            }
+            segments.append(seg_data)
+            segment_id += 1
+    
+    return {
+        "segments": segments,
+        "language": language,
+        "duration": max(s["end"] for s in segments) if segments else 0
+    }
+
+
+def transcribe_with_faster_whisper(
+    audio_path: Path,
+    model_name: str,
+    language: str,
+    audio: Optional[np.ndarray] = None,
+    word_timestamps: bool = True
+) -> Dict[str, Any]:
+    """使用 faster-whisper（NVIDIA GPU）转录单个音频文件（audio 为已解码的波形时直接使用）"""
+    print(f"  加载模型: {model_name} (faster-whisper CUDA 加速)")
+    model = get_model(model_name, "faster")
+    
+    result_segments, info = model.transcribe(
+        audio if audio is not None else str(audio_path),
+        language=language,
+        word_timestamps=word_timestamps,  # 是否计算词级别时间戳
+        vad_filter=False
+    )
+    # result_segments 是生成器，遍历时才真正解码
+    segments = segments_to_alignment(result_segments)
+    print("  ✓ faster-whisper CUDA 加速已启用")
+    
+    return {
+        "segments": segments,
+        "language": language,
+        "duration": to_centiseconds(info.duration) / 100
+    }
+
+
+def confirm_cpu_fallback(assume_yes: bool = False, cpu_fallback: bool = True):
+    """
+    GPU 后端不可用时，要求用户确认是否改用 CPU 模式
+    
+    参数:
+        assume_yes: 为 True 时不询问，直接使用 CPU 模式
+        cpu_fallback: 为 False 时不回退，直接退出
+    """
+    if not cpu_fallback:
+        print("\n错误: 无法使用 GPU 加速，且已禁用 CPU 回退，程序退出。")
+        sys.exit(1)
+    
+    print("\n" + "="*60)
+    print("警告: 无法使用 GPU 加速，将使用 CPU 模式（速度会很慢）")
+    print("="*60)
+    
+    if assume_yes:
+        print("\n已指定自动确认，继续使用 CPU 模式...\n")
+        return
+    
+    # 要求用户确认
+    user_input = input("\n是否继续使用 CPU 模式？输入 YES 继续，其他任何输入将退出: ").strip()
+    
+    if user_input != "YES":
+        print("\n用户取消，程序退出。")
+        sys.exit(0)
+    
+    print("\n用户确认，继续使用 CPU 模式...\n")
+
+
 def transcribe_with_alignment(
     audio_path: Path,
     text_path: Path,
     model_name: str = "medium",
-    language: str = "zh"
+    language: str = "zh",
+    mlx_model: Optional[str] = None,
+    backend: str = "mlx",
+    assume_yes: bool = False,
+    cpu_fallback: bool = True,
+    audio: Optional[np.ndarray] = None,
+    granularity: str = "word"
 ) -> Dict[str, Any]:
     """
     使用 stable-ts 对单个音频文件进行对齐
@@ -98,171 +427,391 @@ def transcribe_with_alignment(
         text_path: 文本文件路径
         model_name: Whisper 模型名称
         language: 语言代码
+        mlx_model: 自定义 MLX 模型（本地路径或 HF 仓库名），None 时按 model_name 选择
+        backend: "mlx"、"faster" 或 "stable"，GPU 后端不可用时（经用户确认）回退到 stable (CPU)
+        assume_yes: 回退到 CPU 时不再询问用户
+        cpu_fallback: 是否允许回退到 CPU
+        audio: 已解码的 16kHz 单声道波形（见 prefetch_audio），None 时由后端自行读取 audio_path
+        granularity: "word" 输出词级别时间戳；"sentence" 只输出句子级别，跳过词级别对齐计算
     
     返回:
-        对齐结果字典（包含词级别时间戳）
+        对齐结果字典（word 粒度时包含词级别时间戳）
     """
+    word_timestamps = granularity == "word"
+
     # 读取参考文本
     with open(text_path, 'r', encoding='utf-8') as f:
         reference_text = f.read().strip()
     
-    # 尝试使用 MLX 加速
-    use_mlx = False
+    # 优先使用 GPU 后端
+    if backend == "mlx":
+        try:
+            return transcribe_with_mlx(audio_path, model_name, language, mlx_model, audio, word_timestamps)
+        except Exception as e:
+            print(f"  ⚠ MLX GPU 加速不可用: {e}")
+            confirm_cpu_fallback(assume_yes, cpu_fallback)
+    elif backend == "faster":
+        try:
+            return transcribe_with_faster_whisper(audio_path, model_name, language, audio, word_timestamps)
+        except Exception as e:
+            print(f"  ⚠ faster-whisper CUDA 加速不可用: {e}")
+            confirm_cpu_fallback(assume_yes, cpu_fallback)
+    
+    # 使用标准 stable-ts（CPU）
+    print(f"  加载模型: {model_name} (CPU 模式)")
+    model = get_model(model_name, "stable")
+    
+    # 转录并对齐（只需要句子级别时间戳）
+    print(f"  处理音频: {audio_path.name}")
+    result = model.transcribe(
+        audio if audio is not None else str(audio_path),
+        language=language,
+        word_timestamps=word_timestamps,  # 是否计算词级别时间戳
+        initial_prompt=reference_text[:100],  # 使用前100字符作为提示
+        vad=False  # 禁用 VAD 以加快速度
+    )
+    
+    # 提取词级别对齐数据
+    segments = segments_to_alignment(result.segments)
+    
+    return {
+        "segments": segments,
+        "language": language,
+        "duration": to_centiseconds(result.duration) / 100 if hasattr(result, 'duration') else 0
+    }
+
+
+
+def sidecar_source(
+    audio_path: Path,
+    model_name: str,
+    mlx_model: Optional[str],
+    backend: str,
+    language: str,
+    granularity: str
+) -> Dict[str, Any]:
+    """
+    生成对齐结果的来源信息（转录参数 + 音频文件大小/修改时间）
+    
+    保存在 .align.json 的 "source" 字段中，任一项变化时已保存的结果失效
+    """
+    stat = audio_path.stat()
+    return {
+        "model": model_name,
+        "mlx_model": mlx_model,
+        "backend": backend,
+        "language": language,
+        "granularity": granularity,
+        "audio_size": stat.st_size,
+        "audio_mtime_ns": stat.st_mtime_ns
+    }
+
+
+def load_alignment_sidecar(audio_path: Path, source: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    读取单个音频已保存的对齐结果
+    
+    文件不存在、已损坏，或来源信息与 source 不一致（换了模型/后端/语言/粒度，或音频已修改）时返回 None
+    """
+    sidecar = audio_path.with_suffix(ALIGN_SIDECAR_SUFFIX)
     try:
-        import mlx_whisper
-        print(f"  加载模型: {model_name} (MLX GPU 加速)")
-        # 使用 mlx-whisper 进行转录（GPU 加速）
-        result_mlx = mlx_whisper.transcribe(
-            str(audio_path),
-            path_or_hf_repo=f"mlx-community/whisper-{model_name}-mlx",
-            verbose=False,
-            language=language,
-            word_timestamps=True  # 启用词级别时间戳
-        )
-        use_mlx = True
-        print("  ✓ MLX GPU 加速已启用")
-        
-        # 提取词级别对齐数据
-        segments = []
-        segment_id = 0
-        
-        for segment in result_mlx["segments"]:
-            # 检查是否有词级别数据
-            if "words" in segment and segment["words"]:
-                # 使用词级别时间戳
-                for word_data in segment["words"]:
-                    word_text = word_data.get("word", "").strip()
-                    if not word_text:
-                        continue
-                    seg_data = {
-                        "id": segment_id,
-                        "start": round(word_data["start"], 2),
-                        "end": round(word_data["end"], 2),
-                        "text": word_text
-                    }
-                    segments.append(seg_data)
-                    segment_id += 1
-            else:
-                # 回退到句子级别
-                seg_data = {
-                    "id": segment_id,
-                    "start": round(segment["start"], 2),
-                    "end": round(segment["end"], 2),
-                    "text": segment["text"].strip()
-                }
-                segments.append(seg_data)
-                segment_id += 1
-        
-        return {
-            "segments": segments,
-            "language": language,
-            "duration": round(max([s["end"] for s in segments]) if segments else 0, 2)
-        }
-        
-    except Exception as e:
-        print(f"  ⚠ MLX GPU 加速不可用: {e}")
-        print("\n" + "="*60)
-        print("警告: 无法使用 GPU 加速，将使用 CPU 模式（速度会很慢）")
-        print("="*60)
-        
-        # 要求用户确认
-        user_input = input("\n是否继续使用 CPU 模式？输入 YES 继续，其他任何输入将退出: ").strip()
-        
-        if user_input != "YES":
-            print("\n用户取消，程序退出。")
-            sys.exit(0)
-        
-        print("\n用户确认，继续使用 CPU 模式...\n")
-        use_mlx = False
+        alignment = read_json(sidecar)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"  警告: 无法读取 {sidecar.name}，将重新转录: {e}")
+        return None
     
-    # 如果 MLX 失败，使用标准 stable-ts（CPU）
-    if not use_mlx:
-        print(f"  加载模型: {model_name} (CPU 模式)")
-        model = stable_whisper.load_model(model_name)
+    if alignment.get("source") != source:
+        return None
+    return alignment
+
+
+def save_alignment_sidecar(audio_path: Path, alignment: Dict[str, Any], source: Dict[str, Any]):
+    """
+    保存单个音频的对齐结果及其来源信息（见 sidecar_source）
+    
+    先写临时文件再替换，避免崩溃时留下半个文件
+    """
+    sidecar = audio_path.with_suffix(ALIGN_SIDECAR_SUFFIX)
+    tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+    write_json(tmp_path, {**alignment, "source": source}, indent=False)
+    os.replace(tmp_path, sidecar)
+
+
+def transcribe_batch(
+    audio_files: List[tuple],
+    model_name: str = "medium",
+    language: str = "zh",
+    mlx_model: Optional[str] = None,
+    resume: bool = True,
+    backend: str = "mlx",
+    assume_yes: bool = False,
+    cpu_fallback: bool = True,
+    granularity: str = "word"
+) -> Tuple[List[Dict[str, Any]], List[Path]]:
+    """
+    按顺序转录全部音频-文本配对，统一管理模型与后端
+    
+    每个文件转录完成后立即保存为 <编号>.align.json，
+    resume=True 时已有结果且转录参数、音频文件都未变化的文件直接读取，不再重新转录；
+    转录当前文件时，后续文件的音频在后台解码（见 prefetch_audio）
+    
+    参数:
+        audio_files: load_audio_files 返回的 [(audio_path, text_path, stem), ...]
+        model_name: Whisper 模型名称
+        language: 语言代码
+        mlx_model: 自定义 MLX 模型（本地路径或 HF 仓库名）
+        resume: 是否复用已保存的单文件对齐结果
+        backend: 转录后端 "mlx"、"faster" 或 "stable"
+        assume_yes: 回退到 CPU 时不再询问用户
+        cpu_fallback: 是否允许回退到 CPU
+        granularity: 时间戳粒度 "word" 或 "sentence"
+    
+    返回:
+        (成功文件的对齐结果列表, 对应的音频路径列表)，两者顺序一致
+    """
+    alignments = []
+    audio_paths = []
+    
+    # 先读取已保存的结果，只为需要转录的文件预取音频
+    sources = [
+        sidecar_source(audio_path, model_name, mlx_model, backend, language, granularity)
+        for audio_path, _, _ in audio_files
+    ]
+    saved = [
+        load_alignment_sidecar(audio_path, source) if resume else None
+        for (audio_path, _, _), source in zip(audio_files, sources)
+    ]
+    todo = [audio_path for (audio_path, _, _), alignment in zip(audio_files, saved) if alignment is None]
+    
+    with closing(prefetch_audio(todo)) as decoded_audio:
+        for (audio_path, text_path, stem), source, alignment in tqdm(
+            zip(audio_files, sources, saved), total=len(audio_files), desc="处理进度"
+        ):
+            print(f"\n处理 {stem}:")
+            
+            if alignment is not None:
+                print("  已有对齐结果，跳过转录")
+                alignments.append(alignment)
+                audio_paths.append(audio_path)
+                continue
+            
+            audio_future = next(decoded_audio)
+            try:
+                alignment = transcribe_with_alignment(
+                    audio_path,
+                    text_path,
+                    model_name=model_name,
+                    language=language,
+                    mlx_model=mlx_model,
+                    backend=backend,
+                    assume_yes=assume_yes,
+                    cpu_fallback=cpu_fallback,
+                    audio=audio_future.result(),
+                    granularity=granularity
+                )
+                save_alignment_sidecar(audio_path, alignment, source)
+                alignments.append(alignment)
+                audio_paths.append(audio_path)
+                
+            except Exception as e:
+                print(f"  错误: {e}")
+                continue
+    
+    return alignments, audio_paths
+
+
+def probe_audio_stream(audio_file: Path) -> Optional[Tuple[str, int, int]]:
+    """
+    用 ffprobe 读取音频文件第一条音频流的参数
+    
+    返回:
+        (编码名, 采样率, 声道数)，读取失败返回 None
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "stream=codec_name,sample_rate,channels",
+        "-of", "json",
+        str(audio_file)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        stream = json.loads(result.stdout)["streams"][0]
+        return stream["codec_name"], int(stream["sample_rate"]), int(stream["channels"])
+    except (OSError, subprocess.CalledProcessError, KeyError, IndexError, ValueError):
+        return None
+
+
+def probe_audio_duration(audio_file: Path) -> Optional[float]:
+    """
+    用 ffprobe 累加第一条音频流所有帧的时长
+    
+    得到的是全部帧（含编码器延迟和末尾补齐的采样）的时长。concat -c copy 拼接时
+    各文件的 Xing/LAME 头不再生效，这些采样都会被播放，因此这才是拼接后实际占用的时长
+    
+    返回:
+        时长（秒），读取失败返回 None
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        "-show_entries", "packet=duration_time",
+        "-of", "json",
+        str(audio_file)
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        packets = json.loads(result.stdout)["packets"]
+        return round(sum(float(p["duration_time"]) for p in packets), 6)
+    except (OSError, subprocess.CalledProcessError, KeyError, ValueError):
+        return None
+
+
+def concat_mp3_with_ffmpeg(
+    audio_files: List[Path],
+    output_path: Path,
+    gap_seconds: float = 1.0
+) -> Optional[Tuple[float, List[float]]]:
+    """
+    用 ffmpeg concat demuxer 直接拼接 MP3 帧（-c copy），不解码也不重新编码
+    
+    文件之间插入与输入参数相同的静音片段。要求所有文件都是采样率、声道数一致的 MP3，
+    否则返回 None（由调用方改用重新编码的方式合并）。ffmpeg 执行失败时抛出异常。
+    
+    返回:
+        (实际插入的静音时长, 每个文件在拼接结果中占用的时长)，单位秒。
+        -c copy 拼接时编码器延迟和末尾补齐的采样都会被播放，因此静音片段会略长于
+        gap_seconds（24kHz 下 1 秒约为 1.056 秒），各文件也会比解码后的时长略长
+    """
+    params = {probe_audio_stream(f) for f in audio_files}
+    if len(params) != 1 or None in params:
+        return None
+    
+    codec, sample_rate, channels = params.pop()
+    if codec != "mp3" or channels not in (1, 2):
+        return None
+    
+    durations = [probe_audio_duration(f) for f in audio_files]
+    if None in durations:
+        return None
+    
+    def concat_entry(path: Path) -> str:
+        # concat 列表中的路径用单引号包裹，路径内的单引号需转义
+        escaped = str(path.resolve()).replace("'", "'\\''")
+        return f"file '{escaped}'"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        entries = []
+        silence_path = Path(tmp_dir) / "silence.mp3"
+        if gap_seconds > 0:
+            subprocess.run(
+                [
+                    "ffmpeg", "-v", "error",
+                    "-f", "lavfi",
+                    "-i", f"anullsrc=r={sample_rate}:cl={'mono' if channels == 1 else 'stereo'}",
+                    "-t", str(gap_seconds),
+                    "-c:a", "libmp3lame", "-q:a", "9",
+                    "-y", str(silence_path)
+                ],
+                capture_output=True, check=True
+            )
+            actual_gap = probe_audio_duration(silence_path)
+            if actual_gap is None:
+                return None
+        else:
+            actual_gap = 0.0
         
-        # 转录并对齐（只需要句子级别时间戳）
-        print(f"  处理音频: {audio_path.name}")
-        result = model.transcribe(
-            str(audio_path),
-            language=language,
-            word_timestamps=True,  # 启用词级别时间戳
-            initial_prompt=reference_text[:100],  # 使用前100字符作为提示
-            vad=False  # 禁用 VAD 以加快速度
-        )
+        for i, audio_file in enumerate(audio_files):
+            # 最后一个文件后不添加静音
+            entries.append(concat_entry(audio_file))
+            if gap_seconds > 0 and i < len(audio_files) - 1:
+                entries.append(concat_entry(silence_path))
         
-        # 提取词级别对齐数据
-        segments = []
-        segment_id = 0
+        list_path = Path(tmp_dir) / "concat.txt"
+        list_path.write_text("\n".join(entries) + "\n", encoding="utf-8")
         
-        for segment in result.segments:
-            # 检查是否有词级别数据
-            if hasattr(segment, 'words') and segment.words:
-                for word in segment.words:
-                    word_text = word.word.strip() if hasattr(word, 'word') else str(word).strip()
-                    if not word_text:
-                        continue
-                    seg_data = {
-                        "id": segment_id,
-                        "start": round(word.start, 2),
-                        "end": round(word.end, 2),
-                        "text": word_text
-                    }
-                    segments.append(seg_data)
-                    segment_id += 1
-            else:
-                # 回退到句子级别
-                seg_data = {
-                    "id": segment_id,
-                    "start": round(segment.start, 2),
-                    "end": round(segment.end, 2),
-                    "text": segment.text.strip()
-                }
-                segments.append(seg_data)
-                segment_id += 1
-        
-        return {
-            "segments": segments,
-            "language": language,
-            "duration": round(result.duration, 2) if hasattr(result, 'duration') else 0
-        }
-
-
+        subprocess.run(
+            [
+                "ffmpeg", "-v", "error",
+                "-f", "concat", "-safe", "0",
+                "-i", str(list_path),
+                "-c", "copy",
+                "-y", str(output_path)
+            ],
+            capture_output=True, check=True
+        )
+    
+    return actual_gap, durations
 
 
-def merge_audio_files(audio_files: List[Path], output_path: Path, gap_seconds: float = 1.0):
+def merge_audio_files(
+    audio_files: List[Path],
+    output_path: Path,
+    gap_seconds: float = 1.0
+) -> Optional[Tuple[float, Optional[List[float]]]]:
     """
     合并多个音频文件，并在每个文件之间插入静音间隔
     
+    优先用 ffmpeg 直接拼接 MP3 帧；输入参数不一致或 ffmpeg 不可用时，用 pydub 解码后重新编码
+    
     参数:
         audio_files: 音频文件列表
         output_path: 输出文件路径
         gap_seconds: 间隔时长（秒）
+    
+    返回:
+        (实际插入的静音时长, 每个文件在合并结果中占用的时长)，用于调整对齐时间戳；
+        用 pydub 合并时各文件时长与解码时长一致，第二项为 None；未合并时返回 None
     """
+    print("\n合并音频文件...")
+    
+    try:
+        result = concat_mp3_with_ffmpeg(audio_files, output_path, gap_seconds)
+        if result is not None:
+            print(f"合并完成: {output_path}（实际间隔 {result[0]:.3f} 秒）")
+            return result
+        print("  无法直接拼接（音频参数不一致或无法读取音频时长），改用 pydub 重新编码合并")
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"  ffmpeg 直接拼接失败: {e}，改用 pydub 重新编码合并")
+    
     try:
         from pydub import AudioSegment
     except ImportError:
         print("警告: pydub 未安装，跳过音频合并")
-        return
+        return None
     
-    print("\n合并音频文件...")
-    combined = AudioSegment.empty()
+    parts = []
     silence = AudioSegment.silent(duration=int(gap_seconds * 1000))
     
-    for i, audio_file in enumerate(tqdm(audio_files, desc="合并进度")):
-        audio = AudioSegment.from_mp3(audio_file)
-        combined += audio
+    # 每次解码都会启动一个 ffmpeg 子进程，彼此独立，用线程池并发解码（map 保持原顺序）
+    max_workers = min(8, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        decoded = executor.map(AudioSegment.from_mp3, audio_files)
         
-        # 最后一个文件后不添加静音
-        if i < len(audio_files) - 1:
-            combined += silence
+        for i, audio in enumerate(tqdm(decoded, total=len(audio_files), desc="合并进度")):
+            parts.append(audio)
+            
+            # 最后一个文件后不添加静音
+            if i < len(audio_files) - 1:
+                parts.append(silence)
+    
+    # 统一采样率/声道/位宽后一次性拼接 PCM 数据，
+    # 避免 combined += audio 每次都复制整段已合并的数据（总耗时随文件数平方增长）
+    parts = AudioSegment._sync(*parts)
+    combined = parts[0]._spawn(b"".join(part._data for part in parts))
     
     combined.export(output_path, format="mp3")
     print(f"合并完成: {output_path}")
+    # 解码后拼接 PCM，间隔就是静音片段的毫秒数
+    return len(silence) / 1000, None
 
 
 def adjust_timestamps_for_merged(
     alignments: List[Dict[str, Any]],
-    gap_seconds: float = 1.0
+    gap_seconds: float = 1.0,
+    durations: Optional[List[float]] = None
 ) -> Dict[str, Any]:
     """
     调整时间戳以适应合并后的音频文件（词级别）
@@ -270,60 +819,96 @@ def adjust_timestamps_for_merged(
     参数:
         alignments: 各个音频文件的对齐数据列表
         gap_seconds: 间隔时长（秒）- 音频合并时在每个文件之间插入的静音时长
+        durations: 各文件在合并音频中实际占用的时长（秒），为 None 时使用对齐数据中的 duration
     
     返回:
         合并后的对齐数据
     """
+    if durations is None:
+        durations = [a["duration"] for a in alignments]
+    
+    # 每个文件的起始偏移量 = 之前所有文件的（时长 + 间隔）之和，以整数厘秒计算
+    gap_cs = to_centiseconds(gap_seconds)
+    offsets = np.cumsum(
+        [0] + [to_centiseconds(d) + gap_cs for d in durations],
+        dtype=np.int64
+    )
     merged_segments = []
-    current_offset = 0.0
-    segment_id = 0
     
-    for i, alignment in enumerate(alignments):
-        for segment in alignment["segments"]:
-            adjusted_segment = {
-                "id": segment_id,
-                "start": round(segment["start"] + current_offset, 2),
-                "end": round(segment["end"] + current_offset, 2),
-                "text": segment["text"]
-            }
-            
-            merged_segments.append(adjusted_segment)
-            segment_id += 1
+    for alignment, offset in zip(alignments, offsets):
+        segments = alignment["segments"]
+        if not segments:
+            continue
+        
+        # 整个文件的 start/end 一次性转为厘秒、平移，再换算回秒
+        times = np.array([(s["start"], s["end"]) for s in segments], dtype=np.float64)
+        times = ((np.rint(times * 100).astype(np.int64) + offset) / 100).tolist()
         
-        # 更新偏移量（当前音频时长 + 间隔）
-        current_offset += alignment["duration"] + gap_seconds
+        segment_id = len(merged_segments)
+        merged_segments.extend(
+            {"id": segment_id + k, "start": start, "end": end, "text": segment["text"]}
+            for k, ((start, end), segment) in enumerate(zip(times, segments))
+        )
     
     return {
         "segments": merged_segments,
         "language": alignments[0]["language"] if alignments else "zh",
-        "duration": round(current_offset - gap_seconds, 2)  # 减去最后一个间隔
+        "duration": (int(offsets[-1]) - gap_cs) / 100  # 减去最后一个间隔
     }
 
 
+def _iter_stripped_text(src, chunk_size: int = 1 << 20):
+    """
+    分块读取文本，效果等同于 src.read().strip()，但不把整个文件读入内存
+    
+    行尾的空白先暂存，只有后面还有非空白内容时才输出
+    """
+    pending = ""
+    started = False
+    while True:
+        chunk = src.read(chunk_size)
+        if not chunk:
+            break
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        body = chunk.rstrip()
+        if body:
+            yield pending + body
+            pending = chunk[len(body):]
+        else:
+            pending += chunk
+
+
 def merge_txt_files(txt_files: List[Path], output_path: Path):
     """
-    合并多个文本文件为一个文件
+    合并多个文本文件为一个文件（逐块写入，内存占用与文件总大小无关）
     
     参数:
         txt_files: 文本文件列表（已按顺序排列）
         output_path: 输出文件路径
     """
     print("\n合并文本文件...")
-    merged_content = []
-    
-    for txt_file in tqdm(txt_files, desc="合并进度"):
-        with open(txt_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if content:
-                merged_content.append(content)
+    total_chars = 0
+    written_files = 0
     
-    # 用换行符分隔各个文件内容
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(merged_content))
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as dst:
+        for txt_file in tqdm(txt_files, desc="合并进度"):
+            with open(txt_file, 'r', encoding='utf-8') as src:
+                # 去掉首尾空白，空文件跳过；各文件内容之间用换行符分隔
+                for i, piece in enumerate(_iter_stripped_text(src)):
+                    if i == 0:
+                        if written_files:
+                            dst.write("\n")
+                        written_files += 1
+                    dst.write(piece)
+                    total_chars += len(piece)
     
     print(f"合并完成: {output_path}")
     print(f"  - 文件数: {len(txt_files)}")
-    print(f"  - 总字符数: {sum(len(c) for c in merged_content)}")
+    print(f"  - 总字符数: {total_chars}")
 
 
 def main():
@@ -354,6 +939,26 @@ def main():
         choices=["tiny", "base", "small", "medium", "large"],
         help=f"Whisper 模型大小 (默认: {MODEL_SIZE})"
     )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default=BACKEND,
+        choices=["mlx", "faster", "stable"],
+        help=f"转录后端: mlx (Apple GPU), faster (NVIDIA GPU, faster-whisper), stable (CPU) (默认: {BACKEND})"
+    )
+    parser.add_argument(
+        "--granularity",
+        type=str,
+        default=GRANULARITY,
+        choices=["word", "sentence"],
+        help=f"时间戳粒度: word (词级别), sentence (句子级别，更快) (默认: {GRANULARITY})"
+    )
+    parser.add_argument(
+        "--mlx-model",
+        type=str,
+        default=MLX_MODEL,
+        help="自定义 MLX 模型的本地路径或 HF 仓库名（如量化模型），默认使用 mlx-community/whisper-{model}-mlx"
+    )
     parser.add_argument(
         "--language",
         type=str,
@@ -391,8 +996,22 @@ def main():
         help=f"合并后的文本文件路径 (默认: {Path(INPUT_FOLDER).joinpath(OUTPUT_MERGED_TXT)})"
     )
 
-    
+    parser.add_argument(
+        "--yes", "-y",
+        action="store_true",
+        default=ASSUME_YES,
+        help="跳过所有交互确认，自动回答 YES（也可设置环境变量 AUDIOBOOK_ASSUME_YES=1）"
+    )
+    parser.add_argument(
+        "--no-cpu-fallback",
+        dest="cpu_fallback",
+        action="store_false",
+        default=CPU_FALLBACK,
+        help="GPU 后端不可用时直接退出，不回退到 CPU 模式"
+    )
+
     args = parser.parse_args()
+    assume_yes = args.yes or os.environ.get("AUDIOBOOK_ASSUME_YES", "").strip().lower() in ("1", "true", "yes")
     
     # 检查输入目录
     if not args.input_dir.exists():
@@ -421,17 +1040,22 @@ def main():
         (not args.merge_audio or merged_audio_exists) and
         (not args.merge_txt or merged_txt_exists)
     )
+    regenerate = False
     if all_exist:
         print("\n" + "="*60)
         print("所有输出文件都已存在！")
         print("="*60)
-        user_input = input("\n是否重新生成？输入 YES 重新生成，其他任何输入将退出: ").strip()
+        if assume_yes:
+            user_input = "YES"
+        else:
+            user_input = input("\n是否重新生成？输入 YES 重新生成，其他任何输入将退出: ").strip()
         
         if user_input != "YES":
             print("\n用户选择跳过，程序退出。")
             sys.exit(0)
         
         print("\n用户确认，将重新生成所有文件...\n")
+        regenerate = True
         alignment_exists = False
         merged_audio_exists = False
         merged_txt_exists = False
@@ -449,46 +1073,48 @@ def main():
     # ============================================================
     # 功能 1: 生成对齐数据
     # ============================================================
+    audio_merged = False
     if alignment_exists:
         print("\n⏭️  跳过对齐数据生成（文件已存在）")
         # 加载现有对齐数据以供后续使用
-        with open(args.output, 'r', encoding='utf-8') as f:
-            merged_alignment = json.load(f)
+        merged_alignment = read_json(args.output)
         audio_paths = [audio_path for audio_path, _, _ in audio_files]
     else:
         print("\n📝 开始生成对齐数据...")
-        # 处理每个音频文件
-        alignments = []
-        audio_paths = []
-        
-        for audio_path, text_path, stem in tqdm(audio_files, desc="处理进度"):
-            print(f"\n处理 {stem}:")
-            
-            try:
-                alignment = transcribe_with_alignment(
-                    audio_path,
-                    text_path,
-                    model_name=args.model,
-                    language=args.language
-                )
-                alignments.append(alignment)
-                audio_paths.append(audio_path)
-                
-            except Exception as e:
-                print(f"  错误: {e}")
-                continue
+        # 处理所有音频文件
+        alignments, audio_paths = transcribe_batch(
+            audio_files,
+            model_name=args.model,
+            language=args.language,
+            mlx_model=args.mlx_model,
+            resume=not regenerate,  # 用户要求重新生成时不复用旧的单文件结果
+            backend=args.backend,
+            granularity=args.granularity,
+            assume_yes=assume_yes,
+            cpu_fallback=args.cpu_fallback
+        )
         
         if not alignments:
             print("错误: 没有成功处理任何文件")
             sys.exit(1)
         
+        # 需要合并音频时先合并，对齐数据按实际的静音时长和各文件时长偏移
+        # （直接拼接 MP3 帧时，静音片段和各文件都会比解码后的时长略长）
+        gap_seconds = args.gap
+        durations = None
+        if args.merge_audio and not merged_audio_exists:
+            print("\n🎵 开始合并音频...")
+            merge_result = merge_audio_files(audio_paths, args.merged_audio_output, args.gap)
+            audio_merged = True  # 功能 2 不再重复合并
+            if merge_result is not None:
+                gap_seconds, durations = merge_result
+        
         # 合并对齐数据
         print("\n合并对齐数据...")
-        merged_alignment = adjust_timestamps_for_merged(alignments, args.gap)
+        merged_alignment = adjust_timestamps_for_merged(alignments, gap_seconds, durations)
         
         # 保存对齐数据
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(merged_alignment, f, ensure_ascii=False, indent=2)
+        write_json(args.output, merged_alignment)
         
         print(f"\n✅ 对齐数据已保存: {args.output}")
         print(f"  - 总段落数: {len(merged_alignment['segments'])}")
@@ -497,7 +1123,7 @@ def main():
     # ============================================================
     # 功能 2: 合并音频文件
     # ============================================================
-    if args.merge_audio:
+    if args.merge_audio and not audio_merged:
         if merged_audio_exists:
             print("\n⏭️  跳过音频合并（文件已存在）")
         else: